@@ -0,0 +1,170 @@
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ----------------------------------------------------------------
+# In-process caches
+# ----------------------------------------------------------------
+
+
+def token_fingerprint(token: str) -> str:
+    """Hash a secret (e.g. a GitHub token) so it can be used as a cache key without storing it."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded mapping that evicts the least recently used entry.
+    Keeps hit/miss/eviction counters so cache effectiveness can be observed.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def pop_matching(self, predicate) -> int:
+        """Drop every entry whose key satisfies predicate; returns how many were dropped."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TTLCache(LRUCache):
+    """LRUCache whose entries expire a fixed number of seconds after they were stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                # Count the expired lookup as a miss rather than a hit.
+                self._data.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+            return default
+        return value
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
+
+    def pop(self, key, default=None):
+        entry = super().pop(key)
+        return default if entry is None else entry[1]
+
+    def stats(self) -> dict:
+        return {**super().stats(), "ttl": self.ttl}
+
+
+MISSING = object()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution whose result (or exception)
+    every caller shares. With ttl > 0 a successful result is also reused for ttl seconds afterwards.
+
+    The shared call runs in its own task, so a caller that goes away (e.g. a closed browser tab)
+    does not cancel the work the other callers are waiting for.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 0.0):
+        self._inflight = {}
+        self.results = TTLCache(maxsize, ttl) if ttl > 0 else None
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cached = 0
+
+    async def do(self, key, function):
+        """Return the result of `await function()`, sharing it with concurrent calls for the same key."""
+        self.calls += 1
+        if self.results is not None:
+            result = self.results.get(key, MISSING)
+            if result is not MISSING:
+                self.cached += 1
+                return result
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = self._inflight[key] = asyncio.create_task(self._run(key, function))
+            # Nobody may be left to retrieve a failure once every caller has gone away.
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key, function):
+        try:
+            result = await function()
+            if self.results is not None:
+                self.results.set(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def forget(self, predicate) -> int:
+        """Drop remembered results whose key satisfies predicate (e.g. after a write)."""
+        return self.results.pop_matching(predicate) if self.results is not None else 0
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cached": self.cached,
+            "in_flight": len(self._inflight),
+            "results": self.results.stats() if self.results is not None else None,
+        }
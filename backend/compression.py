@@ -0,0 +1,93 @@
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import brotli
+except ImportError:  # Without the brotli package only gzip is offered.
+    brotli = None
+
+# ----------------------------------------------------------------
+# Response compression (br when available and accepted, otherwise gzip)
+# ----------------------------------------------------------------
+
+# Bodies at least this large are compressed in a worker thread instead of on the event loop.
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def accepts_encoding(headers: Headers, encoding: str) -> bool:
+    """Whether Accept-Encoding lists encoding without refusing it (q=0)."""
+    for part in headers.get("Accept-Encoding", "").split(","):
+        name, *parameters = part.split(";")
+        if name.strip().lower() != encoding:
+            continue
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least minimum_size bytes. Brotli is used when the client accepts it
+    and the brotli package is installed, gzip (Starlette's GZipMiddleware) otherwise. Streaming
+    responses such as Server-Sent Events are passed through by the brotli path and excluded by
+    GZipMiddleware, so their events are never held back.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and brotli is not None and accepts_encoding(Headers(scope=scope), "br"):
+            await BrotliResponder(self.app, self.minimum_size, self.brotli_quality)(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+class BrotliResponder:
+    """Compresses a response sent as a single body message; anything streamed is passed through."""
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.start_message = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.send(message)
+            return
+
+        start, self.start_message = self.start_message, None
+        body = message.get("body", b"")
+        headers = MutableHeaders(raw=start["headers"])
+        if message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            body = await anyio.to_thread.run_sync(lambda: brotli.compress(body, quality=self.quality))
+        else:
+            body = brotli.compress(body, quality=self.quality)
+        headers["Content-Encoding"] = "br"
+        headers["Content-Length"] = str(len(body))
+        headers.add_vary_header("Accept-Encoding")
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": False})
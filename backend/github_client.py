@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import httpx
+from typing import Optional
+from backend.cache import LRUCache, token_fingerprint
+from backend.metrics import observe_github
+from backend.rate_limit import RateLimitGovernor, backoff_delay, rate_limit_delay, rate_limit_resource
+from backend.resources import LazyResource
+
+# ----------------------------------------------------------------
+# Shared GitHub HTTP client
+# ----------------------------------------------------------------
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{GITHUB_API_URL}/graphql")
+GITHUB_API_VERSION = os.getenv("GITHUB_API_VERSION", "2022-11-28")
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "20"))
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+GITHUB_READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "30"))
+GITHUB_ETAG_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "1024"))
+# Bodies larger than this are not kept in the conditional-request cache.
+GITHUB_ETAG_MAX_ENTRY_BYTES = int(os.getenv("GITHUB_ETAG_MAX_ENTRY_BYTES", str(512 * 1024)))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+
+# Statuses worth retrying for requests that are safe to repeat.
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+# Transport errors raised before the request reached GitHub, so even a POST can be resent.
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+ANONYMOUS = "anonymous"
+
+
+class GitHubClient:
+    """
+    Thin wrapper around a keep-alive httpx.AsyncClient for talking to GitHub.
+
+    All calls share one connection pool, so repeated requests to api.github.com reuse
+    TLS connections instead of performing a new handshake every time. The client also
+    sets the common headers (Accept, API version pinning, Authorization) and runs every
+    request through a per-token rate-limit governor, retrying rate limits and transient
+    failures with jittered backoff.
+    """
+
+    def __init__(self,
+                 base_url: str = GITHUB_API_URL,
+                 pool_size: int = GITHUB_POOL_SIZE,
+                 connect_timeout: float = GITHUB_CONNECT_TIMEOUT,
+                 read_timeout: float = GITHUB_READ_TIMEOUT,
+                 etag_cache_size: int = GITHUB_ETAG_CACHE_SIZE,
+                 max_retries: int = GITHUB_MAX_RETRIES):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.governor = RateLimitGovernor()
+        # The connection pool is created on first use in each process, not at import time.
+        self.sessions = LazyResource(lambda: httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            headers={
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": GITHUB_API_VERSION,
+                "User-Agent": "findingmudders-backend",
+            },
+        ))
+        self.etag_cache = LRUCache(etag_cache_size)
+        self.not_modified = 0
+        # Callbacks receiving the token fingerprint whenever GitHub rejects a token with a 401.
+        self.unauthorized_listeners = []
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        return self.sessions.get()
+
+    def url(self, path: str) -> str:
+        """Resolve an API path (e.g. "/user/repos") against the base URL; absolute URLs pass through."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    async def request(self, method: str, path: str, token=None, headers=None,
+                      idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the pooled client, authenticating with the given token if any.
+
+        Rate-limited responses (403/429) are always retried once the limit allows it. Server
+        errors and dropped connections are only retried for idempotent requests (everything but
+        POST unless stated otherwise), so a create that may have gone through is never repeated.
+        The last response is returned when retries run out or the wait would exceed the governor's
+        maximum.
+        """
+        if idempotent is None:
+            idempotent = method != "POST"
+        url = self.url(path)
+        url_path = httpx.URL(url).path
+        request_headers = dict(headers or {})
+        if token:
+            request_headers["Authorization"] = f"token {token}"
+        fingerprint = token_fingerprint(token) if token else ANONYMOUS
+        resource = rate_limit_resource(url)
+
+        for attempt in range(self.max_retries + 1):
+            await self.governor.acquire(fingerprint, method, resource)
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, headers=request_headers, **kwargs)
+            except httpx.TransportError as e:
+                observe_github(method, url_path, type(e).__name__, time.perf_counter() - started)
+                if attempt == self.max_retries or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                    raise
+                self.governor.retries += 1
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+
+            observe_github(method, url_path, response.status_code, time.perf_counter() - started)
+            self.governor.record(fingerprint, method, response)
+            delay = rate_limit_delay(response)
+            if delay is not None:
+                # The cooldown holds back this retry and every other request of the token.
+                self.governor.record_rate_limited(fingerprint, method, delay)
+                if attempt == self.max_retries or delay > self.governor.max_wait:
+                    break
+            elif response.status_code in RETRYABLE_STATUSES and idempotent and attempt < self.max_retries:
+                await asyncio.sleep(backoff_delay(attempt))
+            else:
+                break
+            self.governor.retries += 1
+
+        if response.status_code == 401 and token:
+            fingerprint = token_fingerprint(token)
+            for listener in self.unauthorized_listeners:
+                listener(fingerprint)
+        return response
+
+    async def get(self, path: str, token=None, conditional: bool = False, **kwargs) -> httpx.Response:
+        """
+        GET a resource. With conditional=True the last response for the same token and URL is
+        revalidated with If-None-Match/If-Modified-Since, and a 304 is answered from the cache.
+        Conditional requests answered with 304 do not count against GitHub's primary rate limit.
+        The returned response has a from_cache attribute telling whether the cached body was used.
+        """
+        if not conditional or not token:
+            response = await self.request("GET", path, token=token, **kwargs)
+            response.from_cache = False
+            return response
+
+        key = (token_fingerprint(token), str(httpx.URL(self.url(path), params=kwargs.get("params"))))
+        cached = self.etag_cache.get(key)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = await self.request("GET", path, token=token, headers=headers, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            return self._cached_response(cached, response)
+
+        response.from_cache = False
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified) and len(response.content) <= GITHUB_ETAG_MAX_ENTRY_BYTES:
+            self.etag_cache.set(key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content": response.content,
+                "headers": dict(response.headers),
+            })
+        elif cached is not None:
+            self.etag_cache.pop(key)
+        return response
+
+    @staticmethod
+    def _cached_response(cached: dict, not_modified: httpx.Response) -> httpx.Response:
+        """Build a 200 response from a cache entry, keeping the fresh rate-limit headers of the 304."""
+        headers = {k: v for k, v in cached["headers"].items()
+                   # The cached content is already decoded, so drop headers describing the wire encoding.
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        headers.update({k: v for k, v in not_modified.headers.items() if k.lower().startswith("x-ratelimit")})
+        response = httpx.Response(200, headers=headers, content=cached["content"], request=not_modified.request)
+        response.from_cache = True
+        return response
+
+    def cache_stats(self) -> dict:
+        return {**self.etag_cache.stats(), "not_modified": self.not_modified}
+
+    def rate_limit_stats(self) -> dict:
+        return self.governor.stats()
+
+    async def post(self, path: str, token=None, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, token=token, **kwargs)
+
+    async def patch(self, path: str, token=None, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", path, token=token, **kwargs)
+
+    async def graphql(self, query: str, variables: dict, token) -> httpx.Response:
+        """Run a GraphQL query against the GitHub v4 API."""
+        # Queries are read-only, so they are retried like GETs.
+        return await self.post(GITHUB_GRAPHQL_URL, token=token, idempotent=True,
+                               json={"query": query, "variables": variables})
+
+    async def aclose(self):
+        """Close the connection pool; a later request opens a new one."""
+        session = self.sessions.reset()
+        if session is not None:
+            await session.aclose()
+
+
+github = GitHubClient()
@@ -0,0 +1,202 @@
+import time
+import uuid
+import asyncio
+import logging
+import datetime
+import contextvars
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from backend.metrics import JOBS, JOB_DURATION, start_trace
+
+# ----------------------------------------------------------------
+# MongoDB-backed background job queue
+# ----------------------------------------------------------------
+
+logger = logging.getLogger("backend.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+# (job id, lease id) of the job the current worker task runs. Kept per task rather than per process,
+# because a worker of the same process may claim a job whose lease this one lost.
+current_lease = contextvars.ContextVar("current_lease", default=None)
+
+
+class LeaseLost(Exception):
+    """The lease of a running job expired and another worker claimed the job."""
+
+
+class JobQueue:
+    """
+    Runs jobs stored in a MongoDB collection on a small pool of asyncio worker tasks.
+
+    Jobs are claimed atomically with a lease, which a heartbeat renews while the handler runs. If a
+    process dies mid-job the lease runs out and another worker resumes the job from its recorded
+    progress. Progress updates only apply while the claiming worker still holds the lease; a worker
+    that lost it stops instead of racing the new one. The handler is responsible for making resumed
+    steps idempotent.
+    """
+
+    def __init__(self, collection, handler, workers: int, lease_seconds: int, poll_seconds: float = 5.0):
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    async def start(self):
+        """Start the worker tasks on the running event loop (idempotent)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        self._tasks = [asyncio.create_task(self._work(), name=f"job-worker-{index}") for index in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the worker tasks; interrupted jobs are resumed once their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, document: dict):
+        """Insert a new job and wake a worker. Returns the job id."""
+        now = utcnow()
+        document = {
+            **document,
+            "status": QUEUED,
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "lease_expires_at": None,
+        }
+        job_id = (await self.collection.insert_one(document)).inserted_id
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id):
+        return await self.collection.find_one({"_id": job_id})
+
+    async def update(self, job_id, fields: dict):
+        """Record progress for a running job and extend its lease. Raises LeaseLost if it was taken over."""
+        now = utcnow()
+        running = current_lease.get()
+        lease = running[1] if running is not None and running[0] == job_id else None
+        query = {"_id": job_id} if lease is None else {"_id": job_id, "lease": lease}
+        result = await self.collection.update_one(
+            query,
+            {"$set": {"updated_at": now,
+                      "lease_expires_at": now + datetime.timedelta(seconds=self.lease_seconds),
+                      **fields}}
+        )
+        if lease is not None and not result.matched_count:
+            raise LeaseLost(f"Lost the lease of job {job_id}")
+
+    async def _heartbeat(self, job_id, handler_task: asyncio.Task) -> bool:
+        """Renew the lease while the handler runs. Cancels the handler and returns True once the lease is lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.update(job_id, {})
+            except LeaseLost:
+                handler_task.cancel()
+                return True
+            except PyMongoError as e:
+                logger.warning("failed to renew job lease", extra={"job_id": str(job_id), "error": str(e)})
+
+    async def requeue(self, job_id) -> bool:
+        """Put a failed job back in the queue so it resumes from its recorded progress."""
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": FAILED},
+            {"$set": {"status": QUEUED, "error": None, "updated_at": utcnow()}}
+        )
+        self._wakeup.set()
+        return bool(result.modified_count)
+
+    async def claim(self):
+        """Atomically take the oldest queued job, or a running job whose lease has expired."""
+        now = utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED},
+                {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": RUNNING, "updated_at": now, "lease": uuid.uuid4().hex,
+                         "lease_expires_at": now + datetime.timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self.claim()
+            except PyMongoError as e:
+                logger.warning("failed to claim job", extra={"error": str(e)})
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        """Run one claimed job, recording its outcome, duration and upstream calls."""
+        job_type = job.get("type", "job")
+        status = SUCCEEDED
+        started = time.perf_counter()
+        lease_token = current_lease.set((job["_id"], job["lease"]))
+        with start_trace() as trace:
+            handler_task = asyncio.create_task(self.handler(job, self))
+            heartbeat = asyncio.create_task(self._heartbeat(job["_id"], handler_task))
+            try:
+                result = await handler_task or {}
+                heartbeat.cancel()
+                await self.update(job["_id"], {**result, "status": SUCCEEDED, "lease_expires_at": None})
+            except asyncio.CancelledError:
+                lost = heartbeat.done() and not heartbeat.cancelled() and heartbeat.result()
+                heartbeat.cancel()
+                handler_task.cancel()
+                if not lost:
+                    raise  # The queue is stopping; the job resumes elsewhere once its lease expires.
+                status = "abandoned"
+            except LeaseLost:
+                heartbeat.cancel()
+                status = "abandoned"
+            except Exception as e:
+                heartbeat.cancel()
+                status = FAILED
+                logger.exception("job failed", extra={"job_id": str(job["_id"]), "job_type": job_type})
+                try:
+                    await self.update(job["_id"], {"status": FAILED, "error": str(e), "lease_expires_at": None})
+                except LeaseLost:
+                    status = "abandoned"
+                except PyMongoError as db_error:
+                    logger.error("failed to record job failure", extra={"job_id": str(job["_id"]), "error": str(db_error)})
+            finally:
+                current_lease.reset(lease_token)
+        if status == "abandoned":
+            # Another worker claimed the job and records its outcome.
+            logger.warning("job abandoned after losing its lease", extra={"job_id": str(job["_id"])})
+        duration = time.perf_counter() - started
+        JOBS.inc(job_type, status)
+        JOB_DURATION.observe(duration, job_type, status)
+        logger.info("job finished", extra={"job_id": str(job["_id"]), "job_type": job_type, "status": status,
+                                           "attempt": job.get("attempts"), "duration_ms": round(duration * 1000, 1),
+                                           "upstream": trace.summary(), "spans": trace.slowest()})
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Callable, Optional
+from backend.metrics import OPENAI_HEDGES, observe_openai
+
+# ----------------------------------------------------------------
+# Hedged, deadline-bound chat completions
+# ----------------------------------------------------------------
+
+logger = logging.getLogger("backend.llm")
+
+# Start another attempt when none has answered after this many seconds.
+OPENAI_HEDGE_AFTER = float(os.getenv("OPENAI_HEDGE_AFTER", "20"))
+# Give up on a completion (cancelling every attempt) after this many seconds.
+OPENAI_DEADLINE = float(os.getenv("OPENAI_DEADLINE", "90"))
+# Attempts per completion, counting hedges and fallbacks after failures.
+OPENAI_MAX_ATTEMPTS = int(os.getenv("OPENAI_MAX_ATTEMPTS", "3"))
+# Models tried after the requested one, e.g. "gpt-4o,gpt-4.1-mini". Each new attempt moves one
+# step down the chain and stays on the last model once it is exhausted.
+OPENAI_FALLBACK_MODELS = [model.strip() for model in os.getenv("OPENAI_FALLBACK_MODELS", "").split(",") if model.strip()]
+
+
+class CompletionDeadlineExceeded(TimeoutError):
+    pass
+
+
+def valid_tool_call(response) -> bool:
+    """A completion is usable when it finished normally with a tool call whose arguments are valid JSON."""
+    choice = response.choices[0]
+    if choice.finish_reason == "length" or not choice.message.tool_calls:
+        return False
+    try:
+        json.loads(choice.message.tool_calls[0].function.arguments)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+async def hedged_chat_completion(client,
+                                 model: str,
+                                 validate: Callable = valid_tool_call,
+                                 hedge_after: float = OPENAI_HEDGE_AFTER,
+                                 deadline: float = OPENAI_DEADLINE,
+                                 max_attempts: int = OPENAI_MAX_ATTEMPTS,
+                                 fallback_models: Optional[list] = None,
+                                 **kwargs):
+    """
+    Create a chat completion, racing a second attempt against a slow first one.
+
+    The first attempt uses `model`. Another attempt starts when no attempt has answered within
+    hedge_after seconds, or right away when one fails or returns an invalid result. Each new attempt
+    uses the next model of the fallback chain. The first valid response wins and the other attempts
+    are cancelled, which closes their connections. CompletionDeadlineExceeded is raised when nothing
+    valid arrived before the deadline, and the last error when every attempt failed.
+    """
+    models = [model] + (OPENAI_FALLBACK_MODELS if fallback_models is None else fallback_models)
+    # The client's own retries would hide slow or failed attempts from the hedging below.
+    client = client.with_options(max_retries=0)
+    started = time.monotonic()
+    deadline_at = started + deadline
+    attempts = {}
+    last_error = None
+
+    def launch(reason: Optional[str]):
+        attempt_model = models[min(len(attempts), len(models) - 1)]
+        if reason:
+            OPENAI_HEDGES.inc(attempt_model, reason)
+            logger.info("starting another completion attempt",
+                        extra={"model": attempt_model, "reason": reason, "attempt": len(attempts) + 1})
+        task = asyncio.create_task(client.chat.completions.create(
+            model=attempt_model, timeout=max(deadline_at - time.monotonic(), 1.0), **kwargs))
+        attempts[task] = (attempt_model, time.perf_counter())
+
+    def observe(task, status: str, usage=None):
+        attempt_model, attempt_started = attempts[task]
+        observe_openai(attempt_model, "chat.completions", status, time.perf_counter() - attempt_started, usage)
+
+    launch(None)
+    pending = set(attempts)
+    next_hedge_at = started + hedge_after
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= deadline_at:
+                raise CompletionDeadlineExceeded(f"No valid completion within {deadline:g}s")
+            done, pending = await asyncio.wait(pending, timeout=min(next_hedge_at, deadline_at) - now,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            failed = False
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    observe(task, "error")
+                    failed = True
+                elif not validate(task.result()):
+                    last_error = ValueError("The model did not return a valid tool call")
+                    observe(task, "invalid", task.result().usage)
+                    failed = True
+                else:
+                    observe(task, "ok", task.result().usage)
+                    return task.result()
+
+            if len(attempts) < max_attempts and (failed or time.monotonic() >= next_hedge_at):
+                launch("fallback" if failed else "hedge")
+                pending.add(list(attempts)[-1])
+                next_hedge_at = time.monotonic() + hedge_after
+            elif not pending:
+                raise last_error
+            elif time.monotonic() >= next_hedge_at:
+                # Out of attempts: just wait for the ones in flight until the deadline.
+                next_hedge_at = deadline_at
+    finally:
+        for task in pending:
+            task.cancel()
+            observe(task, "cancelled")
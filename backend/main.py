@@ -1,22 +1,108 @@
 import os
+import re
 import json
-import requests
+import time
+import base64
+import asyncio
+import logging
 import datetime
+import httpx
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from typing import Optional
-from openai import OpenAI
-from fastapi import FastAPI, HTTPException, Request, Header
+from typing import Literal, Optional
+from openai import AsyncOpenAI
+from fastapi import FastAPI, HTTPException, Request, Response, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from pymongo import MongoClient
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from pymongo import AsyncMongoClient
+from pymongo.errors import PyMongoError
 from bson import ObjectId
+from backend.cache import LRUCache, SingleFlight, TTLCache, token_fingerprint
+from backend.compression import CompressionMiddleware
+from backend.github_client import github
+from backend.jobs import JobQueue, FAILED
+from backend.llm import OPENAI_DEADLINE, hedged_chat_completion
+from backend.logs import configure_logging
+from backend.metrics import (
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    REGISTRY,
+    MongoCommandMetrics,
+    observe_openai,
+    route_template,
+    start_trace,
+)
+from backend.mirror import RepositoryMirror, verify_webhook_signature
+from backend.plan_cache import PlanCache, plan_cache_key
+from backend.plan_sync import diff_plan
+from backend.resources import LazyDatabase, LazyResource
+from backend.scaffold import build_scaffold
+from backend.responses import FastJSONResponse, dumps, json_response
+from backend.planner import (
+    MILESTONE_ISSUES_TOOL,
+    MILESTONE_ISSUES_TOOL_CHOICE,
+    PLAN_MODEL,
+    PLAN_SKELETON_TOOL,
+    PLAN_SKELETON_TOOL_CHOICE,
+    PROJECT_PLAN_TOOL,
+    PROJECT_PLAN_TOOL_CHOICE,
+    PlanStreamParser,
+    build_milestone_issues_messages,
+    build_plan_messages,
+    build_skeleton_messages,
+    merge_milestone_issues,
+)
 
 load_dotenv()
+configure_logging()
+logger = logging.getLogger("backend")
+
+# Clients are created on first use in each worker process (see backend/resources.py), so importing
+# the app stays fast and forked workers never share connections. Pool sizes are per process.
+openai_client = LazyResource(lambda: AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY')))
+mongo_client = LazyResource(lambda: AsyncMongoClient(
+    os.getenv("MONGO_URI"),
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    event_listeners=[MongoCommandMetrics()]
+))
+
+# Seconds /readyz waits for MongoDB to answer a ping.
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start serving right away and prepare MongoDB (indexes, job workers) in the background;
+    /readyz reports when that is done. On shutdown, stop the workers and close every client.
+    """
+    app.state.ready = False
+    preparation = asyncio.create_task(prepare_backend(app))
+    try:
+        yield
+    finally:
+        preparation.cancel()
+        await asyncio.gather(preparation, return_exceptions=True)
+        await provisioning_jobs.stop()
+        await github.aclose()
+        openai = openai_client.reset()
+        if openai is not None:
+            await openai.close()
+        if mongo_client.created:
+            await mongo_client.close()
 
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-mongo_client = MongoClient(os.getenv("MONGO_URI"))
+# JSON is rendered compactly (with orjson when installed), see backend/responses.py.
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
-app = FastAPI()
+# Add a Server-Timing header (GitHub/OpenAI/MongoDB time per request) to every response,
+# or only to requests sending "X-Trace: 1" when disabled. Requests sending "X-Trace: 1" also get
+# an X-Trace-Spans header listing the slowest upstream calls (name, start and duration).
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+# Requests slower than this are logged together with their upstream call summary and slowest calls.
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "2"))
+# Upstream calls listed in X-Trace-Spans and in slow request logs.
+TRACE_SPAN_LIMIT = int(os.getenv("TRACE_SPAN_LIMIT", "20"))
 
 # CORS Middleware
 app.add_middleware(
@@ -25,10 +111,118 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-Trace-Spans"],
 )
 
-db = mongo_client[os.getenv('DB_NAME')]
+# Responses of at least COMPRESSION_MIN_BYTES are sent br- or gzip-encoded when the client accepts it.
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+    gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5")),
+)
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """
+    Time every request by route template and collect the upstream calls made while serving it.
+    The request is measured until its body is fully sent, so streamed responses (such as
+    /generate-project-data/stream) count their whole stream. The trace headers only cover the calls
+    made before the response started.
+    """
+    started = time.perf_counter()
+    with start_trace() as trace:
+        response = await call_next(request)
+    route = route_template(request) or "unmatched"
+    tracing = request.headers.get("X-Trace") == "1"
+    if trace.spans and (SERVER_TIMING or tracing):
+        response.headers["Server-Timing"] = trace.server_timing()
+    if trace.spans and tracing:
+        response.headers["X-Trace-Spans"] = dumps(trace.slowest(TRACE_SPAN_LIMIT)).decode("utf-8")
+    response.body_iterator = observe_body(response.body_iterator, request, route, response.status_code,
+                                          started, trace)
+    return response
+
+async def observe_body(body, request: Request, route: str, status_code: int, started: float, trace):
+    """Pass the response body through, then record the request's metrics and slow request log."""
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        duration = time.perf_counter() - started
+        HTTP_REQUESTS.inc(request.method, route, str(status_code))
+        HTTP_DURATION.observe(duration, request.method, route)
+        if duration >= SLOW_REQUEST_SECONDS:
+            logger.info("slow request", extra={"method": request.method, "route": route,
+                                               "status_code": status_code,
+                                               "duration_ms": round(duration * 1000, 1),
+                                               "upstream": trace.summary(),
+                                               "spans": trace.slowest(TRACE_SPAN_LIMIT)})
+
+db = LazyDatabase(mongo_client, os.getenv('DB_NAME'))
 userprojects_collection = db["userprojects"]
+plan_cache = PlanCache(
+    db["plancache"],
+    memory_size=int(os.getenv("PLAN_CACHE_MEMORY_SIZE", "256")),
+    ttl_seconds=int(os.getenv("PLAN_CACHE_TTL", str(7 * 24 * 3600)))
+)
+
+# Plans for projects of at least this many weeks are generated in two phases unless a mode is requested.
+PLAN_TWO_PHASE_MIN_WEEKS = int(os.getenv("PLAN_TWO_PHASE_MIN_WEEKS", "6"))
+# Milestone expansions of one two-phase plan running at the same time.
+PLAN_EXPANSION_CONCURRENCY = int(os.getenv("PLAN_EXPANSION_CONCURRENCY", "8"))
+
+# Milestones are provisioned in parallel, but GitHub's secondary rate limits
+# punish bursts of content-creating requests, so keep the worker pool small.
+GITHUB_WRITE_CONCURRENCY = int(os.getenv("GITHUB_WRITE_CONCURRENCY", "8"))
+
+# Tolerated difference between our clock and GitHub's when telling whether a repository was
+# created after the job that is about to adopt it.
+REPO_CLOCK_SKEW_SECONDS = int(os.getenv("REPO_CLOCK_SKEW_SECONDS", "30"))
+
+# Checks for the initial commit of a just-created repository before the scaffold gives up.
+SCAFFOLD_REF_ATTEMPTS = int(os.getenv("SCAFFOLD_REF_ATTEMPTS", "4"))
+
+# Last /fetch-milestones result per (token, repository), served again while GitHub reports no changes.
+milestones_cache = LRUCache(int(os.getenv("MILESTONES_CACHE_SIZE", "256")))
+
+# GitHub /user payload per token fingerprint, shared by every endpoint that needs the login.
+github_user_cache = TTLCache(
+    int(os.getenv("GITHUB_USER_CACHE_SIZE", "1024")),
+    float(os.getenv("GITHUB_USER_CACHE_TTL", "300"))
+)
+# A revoked or expired token must not keep resolving from the cache.
+github.unauthorized_listeners.append(github_user_cache.pop)
+
+# Concurrent identical reads (same token, endpoint and repository) share one upstream fetch.
+# /fetch-milestones results are additionally reused for READ_MICROCACHE_TTL seconds (0 disables),
+# and dropped as soon as we change the repository or a webhook reports a change.
+milestone_reads = SingleFlight(
+    int(os.getenv("READ_MICROCACHE_SIZE", "1024")),
+    float(os.getenv("READ_MICROCACHE_TTL", "2"))
+)
+# /user lookups are already cached for GITHUB_USER_CACHE_TTL, so only misses are coalesced.
+github_user_reads = SingleFlight()
+
+# Progress dashboard: repositories fetched at the same time, and how long each may take.
+DASHBOARD_CONCURRENCY = int(os.getenv("DASHBOARD_CONCURRENCY", "6"))
+DASHBOARD_REPO_TIMEOUT = float(os.getenv("DASHBOARD_REPO_TIMEOUT", "20"))
+DASHBOARD_MAX_PROJECTS = int(os.getenv("DASHBOARD_MAX_PROJECTS", "100"))
+
+# Webhook-fed mirror of milestones and issues. Repositories get a webhook pointing at
+# GITHUB_WEBHOOK_URL (e.g. https://<host>/webhooks/github) when one is configured.
+# A repository is re-seeded from a live fetch, and its webhook re-checked, at least this often.
+MIRROR_MAX_STALENESS_SECONDS = float(os.getenv("MIRROR_MAX_STALENESS_SECONDS", "900"))
+mirror = RepositoryMirror(db, MIRROR_MAX_STALENESS_SECONDS)
+GITHUB_WEBHOOK_URL = os.getenv("GITHUB_WEBHOOK_URL")
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+# Failed registrations (e.g. tokens without the admin:repo_hook scope) are retried after this long.
+GITHUB_WEBHOOK_RETRY_SECONDS = int(os.getenv("GITHUB_WEBHOOK_RETRY_SECONDS", "86400"))
+# Whether a token may read a repository, so mirrored data is only served to readers of that repository.
+repo_access_cache = TTLCache(
+    int(os.getenv("REPO_ACCESS_CACHE_SIZE", "4096")),
+    float(os.getenv("REPO_ACCESS_CACHE_TTL", "300"))
+)
 
 # ----------------------------------------------------------------
 # DB Models and Helpers
@@ -51,6 +245,25 @@ class GenerateProjectDataRequest(BaseModel):
     duration: str
     hours_per_day: int
     tech_stack: Optional[str] = None
+    use_cache: bool = True  # Set to false to force a fresh completion
+    # "single" asks for the whole plan in one completion, "two_phase" for a skeleton that is then
+    # expanded per milestone in parallel. By default long projects use two_phase.
+    mode: Optional[Literal["single", "two_phase"]] = None
+
+class PlanIssue(BaseModel):
+    title: str
+    description: str
+
+class PlanMilestone(BaseModel):
+    title: str
+    description: str
+    due_date: Optional[str] = None
+    issues: list[PlanIssue] = []
+
+class ProjectPlan(BaseModel):
+    """The part of project_data that repository provisioning relies on; other keys are kept as they are."""
+    summary: Optional[str] = None
+    milestones: list[PlanMilestone]
 
 class CreateRepoRequest(BaseModel):
     repo_name: str
@@ -58,6 +271,60 @@ class CreateRepoRequest(BaseModel):
     private: bool
     token: str
     project_data: dict
+    tech_stack: Optional[str] = None  # Selects the starter files of the scaffold
+    scaffold: bool = True  # Commit README.md, ROADMAP.md and starter files generated from the plan
+
+class CloseIssuesRequest(BaseModel):
+    issue_numbers: list[int]
+    token: str
+
+class SyncPlanRequest(BaseModel):
+    token: str
+    project_data: dict
+    dry_run: bool = False  # Only report the operations that would be applied
+
+# Fields returned by the project listing; github_token is deliberately never read back out.
+PROJECT_LISTING_PROJECTION = {
+    "username": 1,
+    "title": 1,
+    "description": 1,
+    "github_repo_link": 1,
+    "created_at": 1,
+}
+
+async def ensure_userprojects_indexes():
+    """
+    Create the indexes backing the project listing, and backfill created_at (derived from the
+    ObjectId timestamp) on documents written before the field existed.
+    """
+    await userprojects_collection.update_many(
+        {"created_at": {"$exists": False}},
+        [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+    await userprojects_collection.create_index([("username", 1), ("created_at", -1), ("_id", -1)])
+
+def encode_projects_cursor(project: dict) -> str:
+    """Encode the sort position of the last returned project as an opaque cursor."""
+    position = json.dumps([project["created_at"].isoformat(), str(project["_id"])])
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+def decode_projects_cursor(cursor: str):
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.datetime.fromisoformat(created_at), ObjectId(project_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def project_listing_helper(project: dict) -> dict:
+    """Converts a projected MongoDB project document into the listing representation."""
+    return {
+        "id": str(project["_id"]),
+        "username": project["username"],
+        "title": project["title"],
+        "description": project["description"],
+        "github_repo_link": project["github_repo_link"],
+        "created_at": project["created_at"].isoformat()
+    }
 
 def project_doc_helper(project: dict) -> dict:
     """Converts a MongoDB project document into a JSON-friendly dictionary."""
@@ -75,17 +342,18 @@ def project_doc_helper(project: dict) -> dict:
 # -------------------------------
 
 @app.post("/projects", response_model=UserProject, status_code=201)
-def create_project(project: UserProject):
+async def create_project(project: UserProject):
     """
     Creates a new UserProject document.
     Returns the created project object in JSON with a 201 status code.
     """
-    result = userprojects_collection.insert_one(project.model_dump())
-    created_project = userprojects_collection.find_one({"_id": result.inserted_id})
+    created_project = {**project.model_dump(), "created_at": datetime.datetime.now(datetime.timezone.utc)}
+    result = await userprojects_collection.insert_one(created_project)
+    created_project["_id"] = result.inserted_id
     return project_doc_helper(created_project)
 
 @app.put("/projects/{project_id}", response_model=UserProject, status_code=200)
-def update_project(project_id: str, update: UserProjectUpdate):
+async def update_project(project_id: str, update: UserProjectUpdate):
     """
     Updates only the title and description of a UserProject document.
     If no fields are provided, returns a 400 error.
@@ -94,90 +362,322 @@ def update_project(project_id: str, update: UserProjectUpdate):
     update_data = update.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields provided for update")
-    result = userprojects_collection.update_one(
+    result = await userprojects_collection.update_one(
         {"_id": ObjectId(project_id)},
         {"$set": update_data}
     )
     if result.matched_count:
-        updated_project = userprojects_collection.find_one({"_id": ObjectId(project_id)})
+        updated_project = await userprojects_collection.find_one({"_id": ObjectId(project_id)})
         return project_doc_helper(updated_project)
     raise HTTPException(status_code=404, detail="Project not found")
 
 @app.get("/projects", response_model=list, status_code=200)
-def get_user_projects(username: str):
+async def get_user_projects(response: Response,
+                            username: str,
+                            limit: int = Query(50, ge=1, le=100),
+                            cursor: Optional[str] = None):
     """
-    Retrieves all UserProject documents for a given username.
+    Retrieves UserProject documents for a given username, newest first.
     Pass the username as a query parameter.
-    Returns a list of project objects in JSON with a 200 status code.
+    Returns a list of project objects in JSON with a 200 status code (without the stored GitHub token).
+    When more projects exist, the X-Next-Cursor response header holds the cursor for the next page.
+    """
+    query = {"username": username}
+    if cursor:
+        created_at, project_id = decode_projects_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": project_id}},
+        ]
+    result = userprojects_collection.find(query, PROJECT_LISTING_PROJECTION) \
+        .sort([("created_at", -1), ("_id", -1)]) \
+        .limit(limit + 1)
+    projects = await result.to_list(length=limit + 1)
+    if len(projects) > limit:
+        projects = projects[:limit]
+        response.headers["X-Next-Cursor"] = encode_projects_cursor(projects[-1])
+    return [project_listing_helper(project) for project in projects]
+
+@app.get("/dashboard", status_code=200)
+async def get_user_dashboard(username: str, fields: Optional[str] = None,
+                             token: Optional[str] = Header(None, description="GitHub Personal Access Token")):
     """
-    result = userprojects_collection.find({"username": username})
-    user_projects = [project_doc_helper(project) for project in result]
-    return user_projects
+    Returns every project of a user (newest first, up to DASHBOARD_MAX_PROJECTS) with its milestone and
+    issue completion stats, replacing one /projects call followed by a /fetch-milestones call per project.
+    The token must belong to the GitHub user named by username, and repositories are read with that
+    token (never with the tokens stored on the projects), so a private repository only shows progress
+    to callers who can read it. Repositories are fetched concurrently (at most DASHBOARD_CONCURRENCY
+    at a time). A repository that cannot be read within DASHBOARD_REPO_TIMEOUT seconds gets
+    "progress": null and an "error" instead of failing the whole dashboard.
+    fields (e.g. "title,progress.percent_complete") limits each card to the given dotted paths.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="GitHub token is required")
+    user, response = await lookup_github_user(token)
+    if user is None:
+        if response.status_code == 401:
+            raise HTTPException(status_code=403, detail="Invalid or expired GitHub token")
+        raise HTTPException(status_code=response.status_code, detail=f"GitHub API error: {response.text}")
+    if user["login"].lower() != username.lower():
+        raise HTTPException(status_code=403, detail="Token does not belong to this user")
+    projects = await userprojects_collection.find({"username": username}, PROJECT_LISTING_PROJECTION) \
+        .sort([("created_at", -1), ("_id", -1)]) \
+        .to_list(length=DASHBOARD_MAX_PROJECTS)
+    semaphore = asyncio.Semaphore(DASHBOARD_CONCURRENCY)
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+
+    async def project_card(project):
+        card = project_listing_helper(project)
+        repository = repository_from_link(project["github_repo_link"])
+        if repository is None:
+            return {**card, "progress": None, "error": "Not a GitHub repository link"}
+        try:
+            async with semaphore:
+                milestones = await asyncio.wait_for(
+                    read_milestones_and_issues(*repository, token), DASHBOARD_REPO_TIMEOUT
+                )
+        except asyncio.TimeoutError:
+            return {**card, "progress": None, "error": "Timed out fetching milestones"}
+        except Exception as e:
+            return {**card, "progress": None, "error": str(e)}
+        return {**card, "progress": progress_stats(milestones, today), "error": None}
+
+    return json_response(await asyncio.gather(*(project_card(project) for project in projects)), fields)
+
+def repository_from_link(link: str):
+    """Extract (owner, repo) from a https://github.com/<owner>/<repo> link, or None."""
+    match = re.match(r"^https?://(?:www\.)?github\.com/([^/]+)/([^/?#]+?)(?:\.git)?/?(?:[?#].*)?$", link or "")
+    return (match.group(1), match.group(2)) if match else None
+
+def progress_stats(milestones: list, today: datetime.date) -> dict:
+    """Completion counts of a /fetch-milestones response, and its open milestones past their due date."""
+    issues = [issue for entry in milestones for issue in entry["issues"]]
+    closed_issues = sum(1 for issue in issues if issue["state"] == "closed")
+    overdue = [
+        {"number": entry["milestone"]["number"], "title": entry["milestone"]["title"],
+         "due_on": entry["milestone"]["due_on"]}
+        for entry in milestones
+        if entry["milestone"]["state"] == "open" and entry["milestone"].get("due_on")
+        and datetime.datetime.fromisoformat(entry["milestone"]["due_on"].replace("Z", "+00:00")).date() < today
+    ]
+    return {
+        "milestones": len(milestones),
+        "closed_milestones": sum(1 for entry in milestones if entry["milestone"]["state"] == "closed"),
+        "issues": len(issues),
+        "closed_issues": closed_issues,
+        "percent_complete": round(100 * closed_issues / len(issues), 1) if issues else 0.0,
+        "overdue_milestones": overdue,
+    }
 
 # ----------------------------------------------------------------
 # OpenAI Endpoints & Functions
 # ----------------------------------------------------------------
 
 @app.post("/generate-project-data")
-def generate_project_data(request: GenerateProjectDataRequest):
-    """Generate project summary, milestones, and issues using OpenAI."""
+async def generate_project_data(request: GenerateProjectDataRequest, fields: Optional[str] = None):
+    """
+    Generate project summary, milestones, and issues using OpenAI.
+    Identical (after normalization) requests are answered from the plan cache unless use_cache is false.
+    fields (e.g. "summary,milestones.title,milestones.issues.title") leaves out everything else,
+    such as the issue descriptions.
+    """
     try:
-        json_data = milestone_and_issue_creator(
-            request.project_description,
-            request.features,
-            request.duration,
-            request.hours_per_day,
-            request.tech_stack
-        )
-        return json.loads(json_data)  # Return as JSON object
+        plan = await generate_or_reuse_plan(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate project data: {str(e)}")
+    return json_response(plan, fields)
+
+async def generate_or_reuse_plan(request: GenerateProjectDataRequest) -> dict:
+    cache_key = generation_cache_key(request)
+    if request.use_cache:
+        cached_plan = await plan_cache.get(cache_key)
+        if cached_plan is not None:
+            return cached_plan
+    else:
+        plan_cache.record_bypass()
+    creator = two_phase_plan_creator if uses_two_phase_generation(request) else milestone_and_issue_creator
+    plan = await creator(
+        request.project_description,
+        request.features,
+        request.duration,
+        request.hours_per_day,
+        request.tech_stack
+    )
+    await plan_cache.set(cache_key, plan)
+    return plan
+
+def uses_two_phase_generation(request: GenerateProjectDataRequest) -> bool:
+    """Honour an explicit mode, otherwise use two-phase generation for long projects."""
+    if request.mode is not None:
+        return request.mode == "two_phase"
+    weeks = re.match(r"\s*(\d+)", request.duration or "")
+    return weeks is not None and int(weeks.group(1)) >= PLAN_TWO_PHASE_MIN_WEEKS
+
+def generation_cache_key(request: GenerateProjectDataRequest) -> str:
+    return plan_cache_key(
+        request.project_description,
+        request.features,
+        request.duration,
+        request.hours_per_day,
+        request.tech_stack
+    )
+
+async def cached_plan_events(plan: dict):
+    """Replay a cached plan as the same event sequence a live stream would produce."""
+    yield "summary", {"summary": plan.get("summary")}
+    for index, milestone in enumerate(plan.get("milestones", [])):
+        yield "milestone", {"index": index, "milestone": milestone}
+    yield "done", plan
+
+def server_sent_event(event: str, payload) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+
+@app.post("/generate-project-data/stream")
+async def generate_project_data_stream(request: GenerateProjectDataRequest):
+    """
+    Stream project generation as Server-Sent Events.
+    Emits a "summary" event, one "milestone" event per milestone as soon as it is complete
+    (in completion order for two-phase generation, so use its index), and a final "done" event carrying the full plan (same shape as /generate-project-data).
+    Failures after the stream has started are reported as an "error" event.
+    """
+    async def events():
+        try:
+            cache_key = generation_cache_key(request)
+            cached_plan = await plan_cache.get(cache_key) if request.use_cache else None
+            if not request.use_cache:
+                plan_cache.record_bypass()
+            if cached_plan is not None:
+                source = cached_plan_events(cached_plan)
+            else:
+                creator = (stream_two_phase_plan_creator if uses_two_phase_generation(request)
+                           else stream_milestone_and_issue_creator)
+                source = creator(
+                    request.project_description,
+                    request.features,
+                    request.duration,
+                    request.hours_per_day,
+                    request.tech_stack
+                )
+            async for event, payload in source:
+                if event == "done" and cached_plan is None:
+                    await plan_cache.set(cache_key, payload)
+                yield server_sent_event(event, payload)
+        except Exception as e:
+            yield server_sent_event("error", {"detail": f"Failed to generate project data: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
     
-@app.post("/create-repo")
-def create_repo(request: CreateRepoRequest):
-    """Create a GitHub repository and populate it with milestones and issues."""
+def validate_project_plan(project_data: dict) -> ProjectPlan:
+    """Check project_data against ProjectPlan, raising a 400 that lists the offending fields."""
     try:
-        github_username = get_github_username(request.token)
-        new_repo_name = request.repo_name.replace(' ', '-')
-        result = create_repo_and_process_milestones_and_issues(
-            new_repo_name,
-            request.repo_description,
-            request.private,
-            request.token,
-            request.project_data
+        return ProjectPlan.model_validate(project_data)
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
         )
-        if 'success' in result and result['success']:
-            user_project = UserProject(
-                username=github_username["username"],  # Extract username from the response
-                github_token=request.token,
-                title=new_repo_name,
-                description=request.repo_description,
-                github_repo_link=result['repo_url']
-            )
-            create_project(user_project)  # Pass the UserProject instance directly
-            return result['repo_url']
-        else:
-            raise HTTPException(status_code=400, detail=result.get('message', 'Unknown error'))
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid project_data format")
+        raise HTTPException(status_code=400, detail=f"Invalid project_data format: {errors}")
+
+@app.post("/create-repo", status_code=202)
+async def create_repo(request: CreateRepoRequest):
+    """
+    Queue the creation of a GitHub repository populated with milestones and issues, plus (unless
+    scaffold is false) one commit with a README.md, ROADMAP.md and starter files for the tech stack.
+    Returns a job id right away; poll /create-repo/jobs/{job_id} for progress and the repo URL.
+    """
+    plan = validate_project_plan(request.project_data)
+    try:
+        job_id = await provisioning_jobs.enqueue({
+            "type": "create_repo",
+            "token": request.token,
+            "token_fingerprint": token_fingerprint(request.token),
+            "repo_name": request.repo_name.replace(' ', '-'),
+            "repo_description": request.repo_description,
+            "private": request.private,
+            "project_data": request.project_data,
+            "tech_stack": request.tech_stack,
+            "owner": None,
+            "repo_url": None,
+            "project_saved": False,
+            "scaffold": "pending" if request.scaffold else "skipped",
+            "milestones": [
+                {
+                    "title": milestone.title,
+                    "number": None,
+                    "status": "pending",
+                    "issues": [
+                        {"title": issue.title, "number": None, "status": "pending"}
+                        for issue in milestone.issues
+                    ]
+                }
+                for milestone in plan.milestones
+            ]
+        })
+        return {"job_id": str(job_id), "status_url": f"/create-repo/jobs/{job_id}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create repository: {str(e)}")
 
+def job_doc_helper(job: dict) -> dict:
+    """Converts a provisioning job document into a JSON-friendly progress report (without the token)."""
+    milestones = job["milestones"]
+    issues = [issue for milestone in milestones for issue in milestone["issues"]]
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "repo_url": job.get("repo_url"),
+        "error": job.get("error"),
+        "attempts": job["attempts"],
+        "created_at": job["created_at"].isoformat(),
+        "updated_at": job["updated_at"].isoformat(),
+        "progress": {
+            "milestones_total": len(milestones),
+            "milestones_created": sum(1 for milestone in milestones if milestone["status"] == "created"),
+            "issues_total": len(issues),
+            "issues_created": sum(1 for issue in issues if issue["status"] == "created"),
+            "scaffold": job.get("scaffold", "skipped"),
+        },
+        "milestones": milestones,
+    }
+
+async def get_owned_job(job_id: str, token: Optional[str]) -> dict:
+    """Load a provisioning job, making sure it was created with the same GitHub token."""
+    if not token:
+        raise HTTPException(status_code=401, detail="GitHub token is required")
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await provisioning_jobs.get(ObjectId(job_id))
+    if job is None or job["token_fingerprint"] != token_fingerprint(token):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/create-repo/jobs/{job_id}")
+async def get_create_repo_job(job_id: str, token: Optional[str] = Header(None, description="GitHub Personal Access Token")):
+    """Report the status of a repository provisioning job, down to each milestone and issue."""
+    return job_doc_helper(await get_owned_job(job_id, token))
+
+@app.post("/create-repo/jobs/{job_id}/retry", status_code=202)
+async def retry_create_repo_job(job_id: str, token: Optional[str] = Header(None, description="GitHub Personal Access Token")):
+    """Resume a failed provisioning job; steps that already succeeded are not repeated."""
+    job = await get_owned_job(job_id, token)
+    if job["status"] != FAILED or not await provisioning_jobs.requeue(job["_id"]):
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, only failed jobs can be retried")
+    return {"job_id": job_id, "status_url": f"/create-repo/jobs/{job_id}"}
+
 
 @app.patch("/update-issue/{repo_owner}/{repo_name}/{issue_number}")
-def update_issue_to_complete(repo_owner: str, repo_name: str, issue_number: int, token: str):
+async def update_issue_to_complete(repo_owner: str, repo_name: str, issue_number: int, token: str):
     """Update an issue to complete (closed) in the specified GitHub repository."""
     try:
-        url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/issues/{issue_number}"
-        headers = {
-            "Authorization": f"token {token}",
-            "Content-Type": "application/json",
-        }
         payload = {
             "state": "closed"
         }
-        response = requests.patch(url, headers=headers, data=json.dumps(payload))
+        response = await github.patch(f"/repos/{repo_owner}/{repo_name}/issues/{issue_number}", token=token, json=payload)
         if response.status_code == 200:
+            await mirror_write_through(mirror.apply_issue, repo_owner, repo_name, response.json())
             return {"message": f"Issue #{issue_number} updated to complete (closed) successfully!"}
         else:
             raise HTTPException(status_code=response.status_code, detail=f"Failed to update issue #{issue_number}")
@@ -186,99 +686,490 @@ def update_issue_to_complete(repo_owner: str, repo_name: str, issue_number: int,
 
 
 @app.patch("/update-milestone/{repo_owner}/{repo_name}/{milestone_number}")
-def update_milestone_to_complete(repo_owner: str, repo_name: str, milestone_number: int, token: str):
-    """Update a milestone to complete (closed) if all its issues are closed."""
+async def update_milestone_to_complete(repo_owner: str, repo_name: str, milestone_number: int, token: str):
+    """
+    Update a milestone to complete (closed) if all its issues are closed.
+    The issue states come from the local mirror when it is warm, and from GitHub otherwise.
+    """
     try:
-        url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/milestones/{milestone_number}/issues"
-        headers = {
-            "Authorization": f"token {token}",
-            "Content-Type": "application/json",
-        }
-        # Fetch all issues for the milestone
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            issues = response.json()
-            all_completed = all(issue['state'] == 'closed' for issue in issues)
+        if await mirror_readable(repo_owner, repo_name, token):
+            all_completed = await mirror.milestone_all_closed(repo_owner, repo_name, milestone_number)
+            response = None
+        else:
+            # The milestone carries its open issue count, which (unlike one page of its issues) covers all of them.
+            response = await github.get(f"/repos/{repo_owner}/{repo_name}/milestones/{milestone_number}", token=token)
+            all_completed = response.status_code == 200 and response.json()["open_issues"] == 0
+        if response is None or response.status_code == 200:
             if all_completed:
-                milestone_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/milestones/{milestone_number}"
                 milestone_payload = {
                     "state": "closed"
                 }
-                milestone_response = requests.patch(milestone_url, headers=headers, data=json.dumps(milestone_payload))
+                milestone_response = await github.patch(
+                    f"/repos/{repo_owner}/{repo_name}/milestones/{milestone_number}",
+                    token=token,
+                    json=milestone_payload
+                )
                 if milestone_response.status_code == 200:
+                    await mirror_write_through(mirror.apply_milestone, repo_owner, repo_name, milestone_response.json())
                     return {"message": f"Milestone #{milestone_number} updated to complete (closed) successfully!"}
                 else:
                     raise HTTPException(status_code=milestone_response.status_code, detail=f"Failed to update milestone #{milestone_number}")
             else:
                 return {"message": f"Milestone #{milestone_number} cannot be completed as not all issues are closed."}
         else:
-            raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch issues for milestone #{milestone_number}")
+            raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch milestone #{milestone_number}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update milestone: {str(e)}")
 
 
-@app.get("/fetch-milestones/{repo_owner}/{repo_name}")
-def fetch_all_milestones_and_issues(repo_owner: str, repo_name: str, token: str):
-    """Fetch all milestones and their pertaining issues (open and closed) in the specified GitHub repository."""
+async def close_issue(repo_owner, repo_name, issue_number, token):
+    """Close one issue. Returns its per-item result, including the milestone it belongs to."""
+    try:
+        response = await github.patch(f"/repos/{repo_owner}/{repo_name}/issues/{issue_number}",
+                                      token=token, json={"state": "closed"})
+    except Exception as e:
+        return {"number": issue_number, "closed": False, "error": str(e)}
+    if response.status_code != 200:
+        return {"number": issue_number, "closed": False, "status_code": response.status_code}
+    issue = response.json()
+    await mirror_write_through(mirror.apply_issue, repo_owner, repo_name, issue)
+    milestone = issue.get("milestone")
+    return {"number": issue_number, "closed": True, "milestone": milestone["number"] if milestone else None}
+
+async def complete_milestone_if_done(repo_owner, repo_name, milestone_number, token, use_mirror):
+    """Close a milestone once it has no open issues left. Returns its per-item result."""
+    try:
+        if use_mirror:
+            all_completed = await mirror.milestone_all_closed(repo_owner, repo_name, milestone_number)
+        else:
+            # The milestone itself carries the open issue count, so its issue list is never fetched.
+            response = await github.get(f"/repos/{repo_owner}/{repo_name}/milestones/{milestone_number}", token=token)
+            if response.status_code != 200:
+                return {"number": milestone_number, "closed": False, "status_code": response.status_code}
+            milestone = response.json()
+            if milestone["state"] == "closed":
+                return {"number": milestone_number, "closed": True}
+            all_completed = milestone["open_issues"] == 0
+        if not all_completed:
+            return {"number": milestone_number, "closed": False, "reason": "open issues remain"}
+        response = await github.patch(f"/repos/{repo_owner}/{repo_name}/milestones/{milestone_number}",
+                                      token=token, json={"state": "closed"})
+    except Exception as e:
+        return {"number": milestone_number, "closed": False, "error": str(e)}
+    if response.status_code != 200:
+        return {"number": milestone_number, "closed": False, "status_code": response.status_code}
+    await mirror_write_through(mirror.apply_milestone, repo_owner, repo_name, response.json())
+    return {"number": milestone_number, "closed": True}
+
+
+@app.post("/close-issues/{repo_owner}/{repo_name}")
+async def close_issues(repo_owner: str, repo_name: str, close_request: CloseIssuesRequest):
+    """
+    Close many issues at once, then close every milestone they leave without open issues.
+    Issues are closed concurrently and only the affected milestones are checked, one request each.
+    Failures are reported per item instead of failing the whole batch.
+    """
+    token = close_request.token
+    issue_numbers = list(dict.fromkeys(close_request.issue_numbers))
+    semaphore = asyncio.Semaphore(GITHUB_WRITE_CONCURRENCY)
+
+    async def bounded(call, *args):
+        async with semaphore:
+            return await call(*args)
+
+    issue_results = await asyncio.gather(
+        *(bounded(close_issue, repo_owner, repo_name, number, token) for number in issue_numbers)
+    )
+
+    # Milestones are only checked after every issue has been closed, so each is decided once.
+    milestone_numbers = sorted({result["milestone"] for result in issue_results
+                                if result["closed"] and result["milestone"] is not None})
+    use_mirror = bool(milestone_numbers) and await mirror_readable(repo_owner, repo_name, token)
+    milestone_results = await asyncio.gather(
+        *(bounded(complete_milestone_if_done, repo_owner, repo_name, number, token, use_mirror)
+          for number in milestone_numbers)
+    )
+    return {"issues": issue_results, "milestones": milestone_results}
+
+
+@app.post("/sync-repo/{repo_owner}/{repo_name}")
+async def sync_repo_with_plan(repo_owner: str, repo_name: str, sync_request: SyncPlanRequest):
+    """
+    Apply an edited project_data to an existing repository instead of provisioning a new one.
+    Milestones and issues are matched by number (when the plan carries the numbers from
+    /fetch-milestones) or by title, and only the differences are sent to GitHub: creates, updates,
+    and closes for items the plan dropped. With dry_run set, the operations are returned without
+    applying them. Failures are reported per operation.
+    """
+    validate_project_plan(sync_request.project_data)
+    token = sync_request.token
+    current = await fetch_milestones_live(repo_owner, repo_name, token, with_bodies=True)
+    operations = diff_plan(current, sync_request.project_data)
+    if not sync_request.dry_run and operations:
+        operations = await apply_plan_operations(repo_owner, repo_name, token, operations)
+    summary = {}
+    for operation in operations:
+        key = f'{operation["action"]}_{operation["kind"]}'
+        summary[key] = summary.get(key, 0) + 1
+    return {"dry_run": sync_request.dry_run, "summary": summary, "operations": operations}
+
+def milestone_payload(fields: dict) -> dict:
+    payload = {key: fields[key] for key in ("title", "description") if key in fields}
+    if "due_date" in fields:
+        payload["due_on"] = process_due_date(fields["due_date"]) if fields["due_date"] else None
+    return payload
+
+async def send_plan_operation(operation, method, path, token, payload, apply, repo_owner, repo_name):
+    """Send one sync operation to GitHub and write the result through to the mirror."""
     try:
-        # Step 1: Fetch all milestones
-        url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/milestones"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28"
+        response = await github.request(method, path, token=token, json=payload)
+    except Exception as e:
+        return {**operation, "applied": False, "error": str(e)}
+    if response.status_code not in (200, 201):
+        return {**operation, "applied": False, "status_code": response.status_code}
+    item = response.json()
+    await mirror_write_through(apply, repo_owner, repo_name, item)
+    return {**operation, "applied": True, "number": item["number"]}
+
+async def apply_plan_operations(repo_owner, repo_name, token, operations):
+    """
+    Apply diff_plan operations: milestones first (issues may need their numbers), then issues.
+    Creates within one milestone run in plan order so issue numbers follow the plan; everything else
+    runs concurrently. Issues go to the milestone number diff_plan matched, or, for milestones
+    created by this sync, to the number GitHub returned for that planned title.
+    """
+    base = f"/repos/{repo_owner}/{repo_name}"
+    semaphore = asyncio.Semaphore(GITHUB_WRITE_CONCURRENCY)
+
+    async def send(operation, method, path, payload, apply):
+        async with semaphore:
+            return await send_plan_operation(operation, method, path, token, payload, apply, repo_owner, repo_name)
+
+    def apply_milestone(operation):
+        if operation["action"] == "create":
+            return send(operation, "POST", f"{base}/milestones", milestone_payload(operation), mirror.apply_milestone)
+        payload = {"state": "closed"} if operation["action"] == "close" else milestone_payload(operation["changes"])
+        return send(operation, "PATCH", f"{base}/milestones/{operation['number']}", payload, mirror.apply_milestone)
+
+    milestone_operations = [operation for operation in operations if operation["kind"] == "milestone"]
+    milestone_results = await asyncio.gather(*(apply_milestone(operation) for operation in milestone_operations))
+    created_milestones = {result["title"]: result["number"] for result in milestone_results
+                          if result["applied"] and result["action"] == "create"}
+
+    def issue_payload(fields: dict, milestone_number: Optional[int]) -> Optional[dict]:
+        payload = {key: fields[key] for key in ("title",) if key in fields}
+        if "description" in fields:
+            payload["body"] = fields["description"]
+        if "milestone_title" in fields:
+            if milestone_number is None:
+                milestone_number = created_milestones.get(fields["milestone_title"])
+            if milestone_number is None:
+                return None
+            payload["milestone"] = milestone_number
+        return payload
+
+    async def apply_issue(operation):
+        if operation["action"] == "close":
+            payload = {"state": "closed", "state_reason": "not_planned"}
+        else:
+            fields = operation if operation["action"] == "create" else operation["changes"]
+            payload = issue_payload(fields, operation.get("milestone_number"))
+        if payload is None:
+            return {**operation, "applied": False, "error": "Milestone was not created"}
+        if operation["action"] == "create":
+            return await send(operation, "POST", f"{base}/issues", payload, mirror.apply_issue)
+        return await send(operation, "PATCH", f"{base}/issues/{operation['number']}", payload, mirror.apply_issue)
+
+    async def apply_in_order(issue_operations):
+        return [await apply_issue(operation) for operation in issue_operations]
+
+    creates_by_milestone = {}
+    issue_tasks = []
+    for operation in operations:
+        if operation["kind"] != "issue":
+            continue
+        if operation["action"] == "create":
+            creates_by_milestone.setdefault(operation["milestone_title"], []).append(operation)
+        else:
+            issue_tasks.append(apply_in_order([operation]))
+    issue_tasks.extend(apply_in_order(creates) for creates in creates_by_milestone.values())
+    issue_results = [result for results in await asyncio.gather(*issue_tasks) for result in results]
+    return list(milestone_results) + issue_results
+
+
+MILESTONES_WITH_ISSUES_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    milestones(first: 100, after: $cursor, orderBy: {field: DUE_DATE, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        state
+        description
+        dueOn
+        updatedAt
+        issues(first: 100, orderBy: {field: CREATED_AT, direction: DESC}) {
+          pageInfo { hasNextPage endCursor }
+          nodes { number title state createdAt closedAt updatedAt }
         }
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch milestones: {response.text}")
-
-        milestones = response.json()
-        result = []
-
-        # Step 2: For each milestone, fetch all issues (open and closed)
-        for milestone in milestones:
-            milestone_number = milestone['number']
-            issues_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/issues"
-            params = {
-                "milestone": milestone_number,
-                "state": "all",  # Fetch both open and closed issues
-                "per_page": 100  # Max results per page to reduce pagination needs
-            }
-            issues_response = requests.get(issues_url, headers=headers, params=params)
-
-            if issues_response.status_code != 200:
-                raise HTTPException(status_code=issues_response.status_code, 
-                                   detail=f"Failed to fetch issues for milestone #{milestone_number}: {issues_response.text}")
-
-            issues = issues_response.json()
-            # Simplify issues data to include only relevant fields
-            simplified_issues = [
-                {
-                    "number": issue["number"],
-                    "title": issue["title"],
-                    "state": issue["state"],
-                    "created_at": issue["created_at"],
-                    "closed_at": issue["closed_at"] if issue["state"] == "closed" else None
-                }
-                for issue in issues
-            ]
+      }
+    }
+  }
+}
+"""
+
+ISSUE_FIELDS = "pageInfo { hasNextPage endCursor } nodes { number title state createdAt closedAt updatedAt }"
+
+# Plan sync also compares issue descriptions, which /fetch-milestones never needs.
+MILESTONES_WITH_ISSUE_BODIES_QUERY = MILESTONES_WITH_ISSUES_QUERY.replace("closedAt updatedAt }", "closedAt updatedAt body }")
+ISSUE_FIELDS_WITH_BODY = ISSUE_FIELDS.replace("closedAt updatedAt }", "closedAt updatedAt body }")
 
-            result.append({
-                "milestone": {
-                    "number": milestone["number"],
-                    "title": milestone["title"],
-                    "state": milestone["state"],
-                    "description": milestone["description"]
-                },
-                "issues": simplified_issues
-            })
+async def run_graphql_query(query, variables, token):
+    """Run a GraphQL query and return its repository object, raising HTTPException on failure."""
+    response = await github.graphql(query, variables, token)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=f"GitHub GraphQL error: {response.text}")
+    body = response.json()
+    if body.get("errors"):
+        messages = "; ".join(error.get("message", "Unknown error") for error in body["errors"])
+        raise HTTPException(status_code=404 if (body.get("data") or {}).get("repository") is None else 502,
+                            detail=f"GitHub GraphQL error: {messages}")
+    return body["data"]["repository"]
+
+def simplify_graphql_issue(issue):
+    """Convert a GraphQL issue node into the same shape the REST-based endpoint used to return."""
+    state = issue["state"].lower()
+    return {
+        "number": issue["number"],
+        "title": issue["title"],
+        "state": state,
+        "created_at": issue["createdAt"],
+        "closed_at": issue["closedAt"] if state == "closed" else None
+    }
+
+async def fetch_remaining_issue_pages(repo_owner, repo_name, token, pending, issue_fields=ISSUE_FIELDS):
+    """
+    Fetch the remaining issue pages for milestones that have more than 100 issues.
+    All overflowing milestones are requested together in one aliased query per round.
+
+    pending maps milestone number -> (issue node list, end cursor) and is consumed in place.
+    """
+    while pending:
+        numbers = list(pending)
+        selections = "\n".join(
+            f'm{index}: milestone(number: {number}) {{ '
+            f'issues(first: 100, after: {json.dumps(pending[number][1])}, '
+            f'orderBy: {{field: CREATED_AT, direction: DESC}}) {{ {issue_fields} }} }}'
+            for index, number in enumerate(numbers)
+        )
+        query = f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ {selections} }} }}"
+        repository = await run_graphql_query(query, {"owner": repo_owner, "name": repo_name}, token)
+        for index, number in enumerate(numbers):
+            issues, _ = pending.pop(number)
+            page = repository[f"m{index}"]["issues"]
+            issues.extend(page["nodes"])
+            if page["pageInfo"]["hasNextPage"]:
+                pending[number] = (issues, page["pageInfo"]["endCursor"])
 
-        # Step 3: Return the result in JSON format
-        return result
+async def repository_unchanged(repo_owner, repo_name, token):
+    """
+    Check whether any milestone or issue changed since the previous check, using conditional REST requests.
+    GraphQL does not support ETags, but these two probes are answered with a 304 (which does not count
+    against the primary rate limit) as long as nothing was edited, opened or closed. Both probes are
+    sent at once (and both always run, so each ETag stays current), costing a single round trip.
+    """
+    probes = [
+        (f"/repos/{repo_owner}/{repo_name}/milestones", {"state": "all", "per_page": 100}),
+        (f"/repos/{repo_owner}/{repo_name}/issues", {"state": "all", "sort": "updated", "direction": "desc", "per_page": 1}),
+    ]
+    responses = await asyncio.gather(
+        *(github.get(path, token=token, params=params, conditional=True) for path, params in probes)
+    )
+    return all(response.status_code == 200 and response.from_cache for response in responses)
+
+async def fetch_milestones_live(repo_owner, repo_name, token, with_bodies=False):
+    """
+    Fetch all milestones and their issues from GitHub (with issue bodies when with_bodies is set).
+    Returns a list of (GraphQL milestone node, list of GraphQL issue nodes).
+    """
+    query = MILESTONES_WITH_ISSUE_BODIES_QUERY if with_bodies else MILESTONES_WITH_ISSUES_QUERY
+    # Step 1: Fetch every page of milestones together with their first page of issues
+    milestones = []
+    pending = {}
+    cursor = None
+    while True:
+        variables = {"owner": repo_owner, "name": repo_name, "cursor": cursor}
+        repository = await run_graphql_query(query, variables, token)
+        page = repository["milestones"]
+        for milestone in page["nodes"]:
+            issues = list(milestone["issues"]["nodes"])
+            if milestone["issues"]["pageInfo"]["hasNextPage"]:
+                pending[milestone["number"]] = (issues, milestone["issues"]["pageInfo"]["endCursor"])
+            milestones.append((milestone, issues))
+        if not page["pageInfo"]["hasNextPage"]:
+            break
+        cursor = page["pageInfo"]["endCursor"]
+
+    # Step 2: Fetch the rest of the issues for milestones with more than one page
+    await fetch_remaining_issue_pages(repo_owner, repo_name, token, pending,
+                                      ISSUE_FIELDS_WITH_BODY if with_bodies else ISSUE_FIELDS)
+    return milestones
+
+async def token_can_read_repo(repo_owner, repo_name, token):
+    """Check (and briefly cache) that a token can see a repository before serving it mirrored data."""
+    key = (token_fingerprint(token), repo_owner.lower(), repo_name.lower())
+    allowed = repo_access_cache.get(key)
+    if allowed is None:
+        response = await github.get(f"/repos/{repo_owner}/{repo_name}", token=token, conditional=True)
+        allowed = response.status_code == 200
+        repo_access_cache.set(key, allowed)
+    return allowed
+
+async def mirror_readable(repo_owner, repo_name, token):
+    """True when the mirror of a repository is warm and the token may read it."""
+    try:
+        if not await mirror.is_warm(repo_owner, repo_name):
+            return False
+    except PyMongoError as e:
+        logger.warning("mirror unavailable", extra={"error": str(e)})
+        return False
+    return await token_can_read_repo(repo_owner, repo_name, token)
+
+async def mirror_write_through(apply, repo_owner, repo_name, payload):
+    """Apply our own GitHub update to the mirror right away, without waiting for the webhook."""
+    forget_repository_reads(repo_owner, repo_name)
+    try:
+        await apply(repo_owner, repo_name, payload)
+    except PyMongoError as e:
+        logger.warning("mirror write-through failed", extra={"repo": f"{repo_owner}/{repo_name}", "error": str(e)})
+
+async def ensure_repository_webhook(repo_owner, repo_name, token):
+    """
+    Register the mirror webhook on a repository if a webhook URL is configured.
+    Attempts are recorded so that failed registrations are not retried on every read. Registered
+    webhooks are re-checked whenever the mirror is re-seeded after going stale, so a deleted
+    webhook is put back (GitHub answers 422 when it still exists).
+    """
+    if not GITHUB_WEBHOOK_URL or not GITHUB_WEBHOOK_SECRET:
+        return
+    repo_id = f"{repo_owner.lower()}/{repo_name.lower()}"
+    now = datetime.datetime.now(datetime.timezone.utc)
+    retry_after = now - datetime.timedelta(seconds=GITHUB_WEBHOOK_RETRY_SECONDS)
+    recheck_after = now - datetime.timedelta(seconds=MIRROR_MAX_STALENESS_SECONDS)
+    settled = await mirror.repos.find_one({"_id": repo_id, "$or": [
+        {"webhook_registered": True, "webhook_attempted_at": {"$gt": recheck_after}},
+        {"webhook_registered": False, "webhook_attempted_at": {"$gt": retry_after}},
+    ]})
+    if settled:
+        return
+    payload = {
+        "name": "web",
+        "active": True,
+        "events": ["issues", "milestone"],
+        "config": {"url": GITHUB_WEBHOOK_URL, "content_type": "json", "secret": GITHUB_WEBHOOK_SECRET},
+    }
+    response = await github.post(f"/repos/{repo_owner}/{repo_name}/hooks", token=token, json=payload)
+    # 422 means an identical hook already exists.
+    registered = response.status_code in (201, 422)
+    await mirror.repos.update_one(
+        {"_id": repo_id},
+        {"$set": {"owner": repo_owner.lower(), "repo": repo_name.lower(),
+                  "webhook_attempted_at": now,
+                  "webhook_registered": registered}},
+        upsert=True
+    )
 
+@app.get("/fetch-milestones/{repo_owner}/{repo_name}")
+async def fetch_all_milestones_and_issues(repo_owner: str, repo_name: str, token: str, fields: Optional[str] = None):
+    """
+    Fetch all milestones and their pertaining issues (open and closed) in the specified GitHub repository.
+    Served from the webhook-fed mirror once it is warm. Otherwise uses the GraphQL API so milestones and
+    their issues come back in one round trip for most repositories; additional pages are only requested
+    when there are more than 100 milestones or issues per milestone. Repeated polls of an unchanged
+    repository are served from cache after two conditional requests. Concurrent identical requests
+    share one fetch. fields (e.g. "milestone.title,issues.state") limits each entry to the given dotted paths.
+    """
+    try:
+        milestones = await read_milestones_and_issues(repo_owner, repo_name, token)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch milestones and issues: {str(e)}")
+    return json_response(milestones, fields)
+
+def read_milestones_and_issues(repo_owner, repo_name, token):
+    """load_milestones_and_issues, shared with concurrent identical reads and briefly micro-cached."""
+    key = ("fetch-milestones", token_fingerprint(token), repo_owner.lower(), repo_name.lower())
+    return milestone_reads.do(key, lambda: load_milestones_and_issues(repo_owner, repo_name, token))
+
+def forget_repository_reads(repo_owner, repo_name):
+    """Drop micro-cached /fetch-milestones results of a repository after it changed."""
+    repository = (repo_owner.lower(), repo_name.lower())
+    milestone_reads.forget(lambda key: key[2:] == repository)
+
+async def load_milestones_and_issues(repo_owner, repo_name, token):
+    """Build the /fetch-milestones response from the mirror, the milestones cache or a live fetch."""
+    if await mirror_readable(repo_owner, repo_name, token):
+        return await mirror.read(repo_owner, repo_name)
+
+    cache_key = (token_fingerprint(token), repo_owner.lower(), repo_name.lower())
+    # The probes run before the GraphQL fetch, so a change racing with it is picked up next time.
+    unchanged = await repository_unchanged(repo_owner, repo_name, token)
+    cached = milestones_cache.get(cache_key)
+    if unchanged and cached is not None:
+        return cached
+
+    milestones = await fetch_milestones_live(repo_owner, repo_name, token)
+
+    # Step 3: Return the result in JSON format
+    result = [
+        {
+            "milestone": {
+                "number": milestone["number"],
+                "title": milestone["title"],
+                "state": milestone["state"].lower(),
+                "description": milestone["description"],
+                "due_on": milestone["dueOn"]
+            },
+            "issues": [simplify_graphql_issue(issue) for issue in issues]
+        }
+        for milestone, issues in milestones
+    ]
+    # The milestone probe only covers the first page, so larger repositories are never cached.
+    if len(result) <= 100:
+        milestones_cache.set(cache_key, result)
+
+    # Warm the mirror with what we just fetched; webhook deliveries keep it current from here on.
+    # Both steps are best effort: the live result is returned whatever goes wrong with them.
+    try:
+        await mirror.seed(repo_owner, repo_name, milestones)
+    except Exception as e:
+        logger.warning("failed to seed mirror", extra={"repo": f"{repo_owner}/{repo_name}", "error": str(e)})
+    try:
+        await ensure_repository_webhook(repo_owner, repo_name, token)
+    except Exception as e:
+        logger.warning("failed to register mirror webhook",
+                       extra={"repo": f"{repo_owner}/{repo_name}", "error": str(e)})
+    return result
+
+
+@app.post("/webhooks/github", status_code=202)
+async def receive_github_webhook(request: Request):
+    """
+    Receive GitHub webhook deliveries (issues, milestone, ping) and apply them to the mirror.
+    Deliveries must be signed with GITHUB_WEBHOOK_SECRET.
+    """
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook secret is not configured")
+    body = await request.body()
+    if not verify_webhook_signature(GITHUB_WEBHOOK_SECRET, body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    event = request.headers.get("X-GitHub-Event", "")
+    payload = json.loads(body)
+    await mirror.apply_event(event, payload)
+    repository = payload.get("repository")
+    if repository:
+        forget_repository_reads(repository["owner"]["login"], repository["name"])
+    return {"event": event, "accepted": True}
     
 
 # New OAuth endpoints
@@ -291,7 +1182,7 @@ async def get_access_token(code: str):
         "code": code
     }
     headers = {"Accept": "application/json"}
-    response = requests.post(url, params=params, headers=headers)
+    response = await github.post(url, params=params, headers=headers)
     if response.status_code != 200:
         raise HTTPException(status_code=400, detail="Failed to get access token")
     data = response.json()
@@ -302,27 +1193,64 @@ async def get_user_data(request: Request):
     token = request.headers.get("Authorization", "").replace("Bearer ", "")
     if not token:
         raise HTTPException(status_code=401, detail="No token provided")
-    url = "https://api.github.com/user"
-    headers = {"Authorization": f"token {token}"}  # Changed from "Bearer {token}" to "token {token}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
+    user, response = await lookup_github_user(token)
+    if user is None:
         raise HTTPException(status_code=response.status_code, detail=f"API error: {response.text}")
-    return response.json()
+    return user
 
-def create_github_repo(repo_name, description, private, token):
-    """Create a new GitHub repository."""
-    url = "https://api.github.com/user/repos"
-    headers = {
-        "Authorization": f"token {token}",
-        "Content-Type": "application/json",
+async def lookup_github_user(token):
+    """
+    Resolve a token to its GitHub /user payload, going through the process-wide TTL cache.
+    Returns (user, None) on success and (None, response) with the failed GitHub response otherwise.
+    """
+    fingerprint = token_fingerprint(token)
+    user = github_user_cache.get(fingerprint)
+    if user is not None:
+        return user, None
+    return await github_user_reads.do(("user", fingerprint), lambda: fetch_github_user(token, fingerprint))
+
+async def fetch_github_user(token, fingerprint):
+    response = await github.get("/user", token=token, conditional=True)
+    if response.status_code != 200:
+        return None, response
+    user = response.json()
+    github_user_cache.set(fingerprint, user)
+    return user, None
+
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Report hit/miss counters of the in-process GitHub response caches and read coalescing."""
+    return {
+        "github_conditional": github.cache_stats(),
+        "milestones": milestones_cache.stats(),
+        "github_users": github_user_cache.stats(),
+        "plans": plan_cache.stats(),
+        "coalesced_milestone_reads": milestone_reads.stats(),
+        "coalesced_user_reads": github_user_reads.stats(),
     }
+
+@app.get("/rate-limits")
+async def get_rate_limits():
+    """
+    Report the GitHub rate-limit budget last seen for each token (keyed by a short token
+    fingerprint), together with how often requests were paced, rate limited or retried.
+    """
+    return github.rate_limit_stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request, GitHub, OpenAI, MongoDB and job metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+async def create_github_repo(repo_name, description, private, token):
+    """Create a new GitHub repository."""
     payload = {
         "name": repo_name,
         "description": description,
         "private": private,
         "auto_init": True,
     }
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
+    response = await github.post("/user/repos", token=token, json=payload)
     if response.status_code == 201:
         return response.json()['html_url']
     else:
@@ -334,7 +1262,7 @@ def create_github_repo(repo_name, description, private, token):
             return {"success": False, "status_code": response.status_code, "message": error_info.get('message', 'Unknown error')}
 
 @app.get("/get-github-username")
-def get_github_username(token: Optional[str] = Header(None, description="GitHub Personal Access Token")):
+async def get_github_username(token: Optional[str] = Header(None, description="GitHub Personal Access Token")):
     """
     Fetch the GitHub username associated with the provided personal access token.
     
@@ -352,10 +1280,9 @@ def get_github_username(token: Optional[str] = Header(None, description="GitHub
     if not token:
         raise HTTPException(status_code=401, detail="GitHub token is required")
     try:
-        headers = {'Authorization': f'token {token}'}
-        response = requests.get('https://api.github.com/user', headers=headers)
-        if response.status_code == 200:
-            return {"username": response.json()['login']}
+        user, response = await lookup_github_user(token)
+        if user is not None:
+            return {"username": user['login']}
         elif response.status_code == 401:
             raise HTTPException(status_code=403, detail="Invalid or expired GitHub token")
         else:
@@ -375,21 +1302,16 @@ def process_due_date(due_date):
             due_date_utc = datetime.datetime.combine(date_only, datetime.time(0, 0), tzinfo=datetime.timezone.utc)
             return due_date_utc.isoformat().replace('+00:00', 'Z')
         except ValueError:
-            print(f"Invalid date format: {due_date}")
+            logger.warning("invalid due date", extra={"due_date": due_date})
             return None
     else:
-        print(f"due_date must be a string in YYYY-MM-DD format, got {type(due_date)}")
+        logger.warning("due date is not a YYYY-MM-DD string", extra={"due_date_type": type(due_date).__name__})
         return None
 
-def create_milestone(repo_owner, repo_name, token, milestone_data):
+async def create_milestone(repo_owner, repo_name, token, milestone_data):
     """Create a milestone in the specified GitHub repository."""
     processed_repo_owner = repo_owner['username']
-    url = f"https://api.github.com/repos/{processed_repo_owner}/{repo_name}/milestones"
-    print(url)
-    headers = {
-        "Authorization": f"token {token}",
-        "Content-Type": "application/json",
-    }
+    path = f"/repos/{processed_repo_owner}/{repo_name}/milestones"
     due_on = process_due_date(milestone_data.get("due_date"))
     payload = {
         "title": milestone_data["title"],
@@ -397,145 +1319,430 @@ def create_milestone(repo_owner, repo_name, token, milestone_data):
     }
     if due_on:
         payload["due_on"] = due_on
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
+    try:
+        response = await github.post(path, token=token, json=payload)
+    except httpx.TransportError as e:
+        # Recorded as a failed step like an error response, so a retry of the job can pick it up.
+        logger.error("failed to create milestone", extra={"repo": f"{processed_repo_owner}/{repo_name}",
+                                                           "title": milestone_data["title"], "error": str(e)})
+        return None
     if response.status_code == 201:
-        print(f"Milestone '{milestone_data['title']}' created successfully!")
-        return response.json()['number']
+        number = response.json()['number']
+        logger.info("milestone created", extra={"repo": f"{processed_repo_owner}/{repo_name}", "milestone": number})
+        return number
     else:
-        print(f"Failed to create milestone: {response.status_code}")
+        logger.error("failed to create milestone", extra={"repo": f"{processed_repo_owner}/{repo_name}",
+                                                           "title": milestone_data["title"],
+                                                           "status_code": response.status_code})
         return None
 
-def create_issue(repo_owner, repo_name, token, issue_data, milestone_number):
+async def create_issue(repo_owner, repo_name, token, issue_data, milestone_number):
     """Create an issue in the specified GitHub repository under a milestone."""
     processed_repo_owner = repo_owner['username']
-    url = f"https://api.github.com/repos/{processed_repo_owner}/{repo_name}/issues"
-    headers = {
-        "Authorization": f"token {token}",
-        "Content-Type": "application/json",
-    }
+    path = f"/repos/{processed_repo_owner}/{repo_name}/issues"
     payload = {
         "title": issue_data["title"],
         "body": issue_data["description"],
         "milestone": milestone_number
     }
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
+    try:
+        response = await github.post(path, token=token, json=payload)
+    except httpx.TransportError as e:
+        logger.error("failed to create issue", extra={"repo": f"{processed_repo_owner}/{repo_name}",
+                                                       "title": issue_data["title"], "milestone": milestone_number,
+                                                       "error": str(e)})
+        return None
     if response.status_code == 201:
-        print(f"Issue '{issue_data['title']}' created successfully!")
+        number = response.json()['number']
+        logger.info("issue created", extra={"repo": f"{processed_repo_owner}/{repo_name}", "issue": number,
+                                            "milestone": milestone_number})
+        return number
     else:
-        print(f"Failed to create issue: {response.status_code}")
+        logger.error("failed to create issue", extra={"repo": f"{processed_repo_owner}/{repo_name}",
+                                                       "title": issue_data["title"], "milestone": milestone_number,
+                                                       "status_code": response.status_code})
+        return None
 
-def create_repo_and_process_milestones_and_issues(repo_name, repo_description, private, token, json_data):
-    """Create a GitHub repo and populate it with milestones and issues."""
-    repo_link = create_github_repo(repo_name, repo_description, private, token)
-    if isinstance(repo_link, dict) and not repo_link['success']:
-        return repo_link
-    
-    repo_owner = get_github_username(token)
-    if not repo_owner:
-        return {"success": False, "message": "Failed to get GitHub username"}
+async def find_existing_plan_items(repo_owner, repo_name, token):
+    """
+    Map what already exists in a repository so a resumed job does not create duplicates.
+    Returns ({milestone title: number}, {(milestone number, issue title): issue number}).
+    """
+    milestones = {}
+    issues = {}
+    for entry in await load_milestones_and_issues(repo_owner, repo_name, token):
+        milestone_number = entry["milestone"]["number"]
+        milestones.setdefault(entry["milestone"]["title"], milestone_number)
+        for issue in entry["issues"]:
+            issues.setdefault((milestone_number, issue["title"]), issue["number"])
+    return milestones, issues
 
-    data = json.dumps(json_data)
+async def commit_scaffold(repo_owner, repo_name, token, files: dict) -> str:
+    """
+    Write files to the default branch of a repository as one commit through the Git Data API, with
+    every file inlined into a single tree: six requests however many files there are. The tree is
+    based on the current head, so existing files are kept and only the scaffold paths (such as the
+    README created by auto_init) are overwritten. Returns the commit SHA.
+    """
+    base = f"/repos/{repo_owner}/{repo_name}"
+    repository = await github.get(base, token=token)
+    if repository.status_code != 200:
+        raise RuntimeError(f"Failed to read the repository: {repository.status_code}")
+    branch = repository.json()["default_branch"]
+    # The initial commit of a just-created repository can take a moment to become visible.
+    for attempt in range(SCAFFOLD_REF_ATTEMPTS):
+        ref = await github.get(f"{base}/git/ref/heads/{branch}", token=token)
+        if ref.status_code not in (404, 409):
+            break
+        await asyncio.sleep(attempt + 1)
+    if ref.status_code != 200:
+        raise RuntimeError(f"Failed to read branch {branch}: {ref.status_code}")
+    parent = ref.json()["object"]["sha"]
+    head = await github.get(f"{base}/git/commits/{parent}", token=token)
+    if head.status_code != 200:
+        raise RuntimeError(f"Failed to read the head commit of {branch}: {head.status_code}")
 
-    print(data)
+    tree = await github.post(f"{base}/git/trees", token=token, json={
+        "base_tree": head.json()["tree"]["sha"],
+        "tree": [{"path": path, "mode": "100644", "type": "blob", "content": content}
+                 for path, content in files.items()]
+    })
+    if tree.status_code != 201:
+        raise RuntimeError(f"Failed to create the scaffold tree: {tree.status_code}")
+    commit = await github.post(f"{base}/git/commits", token=token, json={
+        "message": "Add project scaffold", "tree": tree.json()["sha"], "parents": [parent]
+    })
+    if commit.status_code != 201:
+        raise RuntimeError(f"Failed to create the scaffold commit: {commit.status_code}")
+    sha = commit.json()["sha"]
+    # Not forced: if someone pushed in the meantime the update fails instead of dropping their commit.
+    update = await github.patch(f"{base}/git/refs/heads/{branch}", token=token, json={"sha": sha})
+    if update.status_code != 200:
+        raise RuntimeError(f"Failed to update branch {branch}: {update.status_code}")
+    logger.info("scaffold committed", extra={"repo": f"{repo_owner}/{repo_name}", "files": len(files), "commit": sha})
+    return sha
 
-    parsed_data = json.loads(data)
+async def provision_scaffold(job, queue, repo_owner):
+    """Commit the scaffold of a job unless that already happened. Returns the number of failed steps."""
+    if job.get("scaffold", "skipped") in ("skipped", "committed"):
+        return 0
+    files = build_scaffold(job["repo_name"], job["repo_description"], job["project_data"], job.get("tech_stack"))
+    try:
+        await commit_scaffold(repo_owner["username"], job["repo_name"], job["token"], files)
+    except Exception as e:
+        logger.error("failed to commit scaffold", extra={"repo": f"{repo_owner['username']}/{job['repo_name']}",
+                                                         "error": str(e)})
+        await queue.update(job["_id"], {"scaffold": "failed"})
+        return 1
+    await queue.update(job["_id"], {"scaffold": "committed"})
+    return 0
 
-    for milestone_data in parsed_data["milestones"]:
-        milestone_number = create_milestone(repo_owner, repo_name, token, milestone_data)
-        if milestone_number:
-            for issue_data in milestone_data["issues"]:
-                create_issue(repo_owner, repo_name, token, issue_data, milestone_number)
-        
-    return {"success": True, "repo_url": repo_link}
-
-def milestone_and_issue_creator(description: str,
-                                features: str,
-                                duration: str,
-                                hours_per_day: int,
-                                tech_stack: Optional[str] = None):
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are an AI product manager. Generate a project summary, milestones, and issues with "
-                           f"step-by-step instructions. Be as technical as you can when generating the milestones and issues." 
-                           "Today's date is {datetime.today().strftime('%Y-%m-%d')}"
-            },
-            {
-                "role": "user",
-                "content": f"""
-    ### Project Description:
-    {description}
-
-    ### Features:
-    {features}
-
-    ### Expected Project Duration (in weeks):
-    {duration}
-
-    ### Number of Hours Per Day the User Will Work:
-    {hours_per_day}
-
-    ### Tech Stack (optional):
-    {tech_stack}
-    """
-            }
-        ],
-        tools=[
-            {
-                "type": "function",
-                "function": {
-                    "name": "generate_project_summary",
-                    "description": "Takes project details and generates a summary, milestones, and detailed issues with step-by-step instructions.",
-                    "parameters": {
-                        "type": "object",
-                        "required": ["summary", "milestones"],
-                        "properties": {
-                            "summary": {
-                                "type": "string",
-                                "description": "Summary of the user's project description and features"
-                            },
-                            "milestones": {
-                                "type": "array",
-                                "description": "List of GitHub milestones with their issues",
-                                "items": {
-                                    "type": "object",
-                                    "required": ["title", "description", "due_date", "issues"],
-                                    "properties": {
-                                        "title": {"type": "string", "description": "Title of the milestone"},
-                                        "description": {"type": "string",
-                                                        "description": "Brief description of the milestone"},
-                                        "due_date": {"type": "string",
-                                                     "description": "Estimated due date (YYYY-MM-DD)"},
-                                        "issues": {
-                                            "type": "array",
-                                            "description": "List of GitHub issues under this milestone",
-                                            "items": {
-                                                "type": "object",
-                                                "required": ["title", "description"],
-                                                "properties": {
-                                                    "title": {"type": "string",
-                                                              "description": "Title of the issue/task"},
-                                                    "description": {"type": "string",
-                                                                    "description": "Step-by-step instructions on how to complete this issue"}
-                                                }
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        ],
-        tool_choice={"type": "function", "function": {"name": "generate_project_summary"}}
+async def provision_milestone(job, queue, index, repo_owner, existing_milestones, existing_issues):
+    """
+    Create one milestone of a job and then its issues, recording each step in the job document.
+    Issues are created one after another so that their numbers follow the order of the plan.
+    Returns the number of steps that failed.
+    """
+    repo_name = job["repo_name"]
+    token = job["token"]
+    progress = job["milestones"][index]
+    milestone_data = job["project_data"]["milestones"][index]
+
+    milestone_number = progress["number"] or existing_milestones.get(milestone_data["title"])
+    if milestone_number is None:
+        milestone_number = await create_milestone(repo_owner, repo_name, token, milestone_data)
+        if milestone_number is None:
+            await queue.update(job["_id"], {f"milestones.{index}.status": "failed"})
+            return 1 + len(milestone_data.get("issues", []))
+    if progress["status"] != "created":
+        await queue.update(job["_id"], {f"milestones.{index}.number": milestone_number,
+                                  f"milestones.{index}.status": "created"})
+
+    failures = 0
+    for issue_index, issue_data in enumerate(milestone_data.get("issues", [])):
+        issue_progress = progress["issues"][issue_index]
+        if issue_progress["status"] == "created":
+            continue
+        issue_number = existing_issues.get((milestone_number, issue_data["title"]))
+        if issue_number is None:
+            issue_number = await create_issue(repo_owner, repo_name, token, issue_data, milestone_number)
+        field = f"milestones.{index}.issues.{issue_index}"
+        if issue_number is None:
+            failures += 1
+            await queue.update(job["_id"], {f"{field}.status": "failed"})
+        else:
+            await queue.update(job["_id"], {f"{field}.number": issue_number, f"{field}.status": "created"})
+    return failures
+
+async def gather_or_cancel(*coroutines):
+    """
+    Like asyncio.gather, but when one of the coroutines raises, the others are cancelled (and awaited)
+    before the error propagates, so a failed job leaves no provisioning work running behind it.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+async def find_repo_created_by_job(job, repo_owner, token):
+    """
+    The repository a previous attempt of job created without recording it, or None. A repository with
+    the same name that already existed before the job (e.g. an unrelated one of the user) is never adopted.
+    """
+    response = await github.get(f"/repos/{repo_owner}/{job['repo_name']}", token=token)
+    if response.status_code != 200:
+        return None
+    repository = response.json()
+    created_at = datetime.datetime.fromisoformat(repository["created_at"].replace("Z", "+00:00"))
+    job_created_at = job["created_at"]
+    if job_created_at.tzinfo is None:
+        job_created_at = job_created_at.replace(tzinfo=datetime.timezone.utc)
+    if created_at < job_created_at - datetime.timedelta(seconds=REPO_CLOCK_SKEW_SECONDS):
+        return None
+    return repository
+
+async def run_create_repo_job(job, queue):
+    """
+    Job handler: create the repository, commit its scaffold, create its milestones and issues, and
+    save the UserProject.
+    Safe to run again on a partially completed job; finished steps are skipped, and when resuming,
+    milestones and issues that already exist on GitHub (matched by title) are adopted instead of recreated.
+    """
+    token = job["token"]
+    repo_name = job["repo_name"]
+    resuming = job["attempts"] > 1
+
+    user, response = await lookup_github_user(token)
+    if user is None:
+        raise RuntimeError(f"Failed to get GitHub username: {response.status_code}")
+    repo_owner = {"username": user["login"]}
+
+    repo_url = job.get("repo_url")
+    if not repo_url:
+        # Marks that a creation request may have reached GitHub, so later attempts know a repository
+        # with this name could be the job's own.
+        sent_before = job.get("repo_create_sent", False)
+        if not sent_before:
+            await queue.update(job["_id"], {"repo_create_sent": True})
+        repo_url = await create_github_repo(repo_name, job["repo_description"], job["private"], token)
+        if isinstance(repo_url, dict):
+            existing = await find_repo_created_by_job(job, user["login"], token) if sent_before else None
+            if existing is None:
+                messages = repo_url.get("error_messages") or [repo_url.get("message", "Unknown error")]
+                raise RuntimeError("; ".join(messages))
+            repo_url = existing["html_url"]
+        await queue.update(job["_id"], {"owner": user["login"], "repo_url": repo_url})
+        # Best effort, as in load_milestones_and_issues: reads register the webhook later if this fails.
+        try:
+            await ensure_repository_webhook(user["login"], repo_name, token)
+        except Exception as e:
+            logger.warning("failed to register mirror webhook",
+                           extra={"repo": f"{user['login']}/{repo_name}", "error": str(e)})
+
+    existing_milestones, existing_issues = {}, {}
+    if resuming:
+        existing_milestones, existing_issues = await find_existing_plan_items(user["login"], repo_name, token)
+
+    # Each milestone (and its ordered chain of issues) runs as its own task, so the
+    # total time is bounded by the largest milestone rather than the total issue count.
+    semaphore = asyncio.Semaphore(GITHUB_WRITE_CONCURRENCY)
+
+    async def bounded_provision_milestone(index):
+        async with semaphore:
+            return await provision_milestone(job, queue, index, repo_owner, existing_milestones, existing_issues)
+
+    failures = sum(await gather_or_cancel(
+        provision_scaffold(job, queue, repo_owner),
+        *(bounded_provision_milestone(index) for index in range(len(job["milestones"])))
+    ))
+
+    if not job.get("project_saved"):
+        user_project = UserProject(
+            username=user["login"],
+            github_token=token,
+            title=repo_name,
+            description=job["repo_description"],
+            github_repo_link=repo_url
+        )
+        await userprojects_collection.update_one(
+            {"username": user_project.username, "github_repo_link": repo_url},
+            {"$setOnInsert": {**user_project.model_dump(), "created_at": datetime.datetime.now(datetime.timezone.utc)}},
+            upsert=True
+        )
+        await queue.update(job["_id"], {"project_saved": True})
+
+    if failures:
+        raise RuntimeError(f"{failures} step(s) (scaffold, milestones or issues) failed; retry the job to resume")
+    return {"repo_url": repo_url}
+
+provisioning_jobs = JobQueue(
+    db["provisioningjobs"],
+    run_create_repo_job,
+    workers=int(os.getenv("PROVISIONING_WORKERS", "2")),
+    lease_seconds=int(os.getenv("PROVISIONING_LEASE_SECONDS", "300"))
+)
+
+async def prepare_backend(app: FastAPI):
+    """Create indexes and start the job workers, retrying with backoff while MongoDB is unreachable."""
+    delay = 1.0
+    while True:
+        try:
+            await ensure_userprojects_indexes()
+            await mirror.ensure_indexes()
+            await provisioning_jobs.start()
+            break
+        except PyMongoError as e:
+            logger.warning("startup preparation failed", extra={"error": str(e), "retry_in": delay})
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+    app.state.ready = True
+    logger.info("backend ready")
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop responds. Does not touch any dependency."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    """Readiness: startup preparation finished and MongoDB answers a ping. Returns 503 otherwise."""
+    checks = {"startup": bool(getattr(request.app.state, "ready", False))}
+    try:
+        await asyncio.wait_for(mongo_client.admin.command("ping"), READINESS_TIMEOUT)
+        checks["mongo"] = True
+    except Exception:
+        checks["mongo"] = False
+    ready = all(checks.values())
+    return JSONResponse({"status": "ready" if ready else "not ready", "checks": checks},
+                        status_code=200 if ready else 503)
+
+async def create_chat_completion(**kwargs):
+    """
+    Call the chat completions API with a deadline, hedging slow attempts and falling back to
+    OPENAI_FALLBACK_MODELS on failures (see backend/llm.py). Latency and token usage are recorded.
+    """
+    return await hedged_chat_completion(openai_client, **kwargs)
+
+async def milestone_and_issue_creator(description: str,
+                                      features: str,
+                                      duration: str,
+                                      hours_per_day: int,
+                                      tech_stack: Optional[str] = None) -> dict:
+    response = await create_chat_completion(
+        model=PLAN_MODEL,
+        messages=build_plan_messages(description, features, duration, hours_per_day, tech_stack),
+        tools=[PROJECT_PLAN_TOOL],
+        tool_choice=PROJECT_PLAN_TOOL_CHOICE
     )
-    tool_call = response.choices[0].message.tool_calls[0]
-    return json.dumps(json.loads(tool_call.function.arguments), indent=2)
+    return tool_call_arguments(response)
+
+async def stream_milestone_and_issue_creator(description: str,
+                                       features: str,
+                                       duration: str,
+                                       hours_per_day: int,
+                                       tech_stack: Optional[str] = None):
+    """
+    Same as milestone_and_issue_creator, but streams the completion and yields (event, payload) pairs
+    as soon as the summary or a milestone is complete, followed by ("done", full_plan).
+    """
+    started = time.perf_counter()
+    status, usage = "error", None
+    try:
+        stream = await openai_client.chat.completions.create(
+            model=PLAN_MODEL,
+            messages=build_plan_messages(description, features, duration, hours_per_day, tech_stack),
+            tools=[PROJECT_PLAN_TOOL],
+            tool_choice=PROJECT_PLAN_TOOL_CHOICE,
+            stream=True,
+            stream_options={"include_usage": True},
+            # Streams are not hedged, but a stalled one must not hold the request forever.
+            timeout=OPENAI_DEADLINE
+        )
+        parser = PlanStreamParser()
+        async for chunk in stream:
+            # With include_usage the last chunk carries the token counts and no choices.
+            usage = chunk.usage or usage
+            if not chunk.choices:
+                continue
+            for tool_call in chunk.choices[0].delta.tool_calls or []:
+                if tool_call.function and tool_call.function.arguments:
+                    for event in parser.feed(tool_call.function.arguments):
+                        yield event
+        status = "ok"
+        yield "done", parser.result()
+    except (GeneratorExit, asyncio.CancelledError):
+        # The client went away before the plan was complete.
+        status = "cancelled"
+        raise
+    finally:
+        observe_openai(PLAN_MODEL, "chat.completions.stream", status, time.perf_counter() - started, usage)
+
 
 
+def tool_call_arguments(response) -> dict:
+    return json.loads(response.choices[0].message.tool_calls[0].function.arguments)
+
+async def stream_two_phase_plan_creator(description: str,
+                                        features: str,
+                                        duration: str,
+                                        hours_per_day: int,
+                                        tech_stack: Optional[str] = None):
+    """
+    Generate a plan in two phases: a compact skeleton (summary, milestones and issue titles), then the
+    step-by-step instructions of every milestone in parallel completions. Yields the same (event, payload)
+    pairs as stream_milestone_and_issue_creator, with milestones in the order their expansion finishes.
+    The wall-clock time follows the largest milestone rather than the whole plan.
+    """
+    skeleton = tool_call_arguments(await create_chat_completion(
+        model=PLAN_MODEL,
+        messages=build_skeleton_messages(description, features, duration, hours_per_day, tech_stack),
+        tools=[PLAN_SKELETON_TOOL],
+        tool_choice=PLAN_SKELETON_TOOL_CHOICE
+    ))
+    yield "summary", {"summary": skeleton["summary"]}
+
+    semaphore = asyncio.Semaphore(PLAN_EXPANSION_CONCURRENCY)
+
+    async def expand(index):
+        milestone = skeleton["milestones"][index]
+        if not milestone["issues"]:
+            return index, merge_milestone_issues(milestone, [])
+        async with semaphore:
+            response = await create_chat_completion(
+                model=PLAN_MODEL,
+                messages=build_milestone_issues_messages(description, features, duration, hours_per_day,
+                                                         tech_stack, skeleton, index),
+                tools=[MILESTONE_ISSUES_TOOL],
+                tool_choice=MILESTONE_ISSUES_TOOL_CHOICE
+            )
+        return index, merge_milestone_issues(milestone, tool_call_arguments(response).get("issues", []))
+
+    milestones = [None] * len(skeleton["milestones"])
+    tasks = [asyncio.create_task(expand(index)) for index in range(len(milestones))]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            index, milestone = await finished
+            milestones[index] = milestone
+            yield "milestone", {"index": index, "milestone": milestone}
+    finally:
+        # Stop the remaining expansions if one failed or the client went away.
+        for task in tasks:
+            task.cancel()
+    yield "done", {"summary": skeleton["summary"], "milestones": milestones}
+
+async def two_phase_plan_creator(description: str,
+                                 features: str,
+                                 duration: str,
+                                 hours_per_day: int,
+                                 tech_stack: Optional[str] = None) -> dict:
+    """Run stream_two_phase_plan_creator to completion and return the merged plan."""
+    async for event, payload in stream_two_phase_plan_creator(description, features, duration, hours_per_day, tech_stack):
+        if event == "done":
+            return payload
 
 # print(milestone_and_issue_creator("Create a hookup app", "Find attractive girls nearby and a chat feature to make appointment with them", "4", 6, "React Typescript, Node, and MySQL"))
 
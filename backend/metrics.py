@@ -0,0 +1,259 @@
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+from pymongo import monitoring
+
+# ----------------------------------------------------------------
+# Prometheus-style metrics and per-request trace spans
+# ----------------------------------------------------------------
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            yield self.name, format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Observations bucketed by upper bound, with a running sum and count per label combination."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(label_values, {**series, "buckets": list(series["buckets"])})
+                     for label_values, series in self._values.items()]
+        for label_values, series in items:
+            for bound, count in zip(self.buckets, series["buckets"]):
+                yield (f"{self.name}_bucket",
+                       format_labels(self.labels + ("le",), label_values + (repr(float(bound)),)), count)
+            yield f"{self.name}_bucket", format_labels(self.labels + ("le",), label_values + ("+Inf",)), series["count"]
+            yield f"{self.name}_sum", format_labels(self.labels, label_values), series["sum"]
+            yield f"{self.name}_count", format_labels(self.labels, label_values), series["count"]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests handled, by route template and status.", ("method", "route", "status")))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time spent handling requests, until the last body chunk is sent.", ("method", "route")))
+GITHUB_REQUESTS = REGISTRY.register(Counter(
+    "github_requests_total", "Requests sent to GitHub (every retry counts), by route template and status.",
+    ("method", "route", "status")))
+GITHUB_DURATION = REGISTRY.register(Histogram(
+    "github_request_duration_seconds", "Latency of requests sent to GitHub.", ("method", "route")))
+OPENAI_REQUESTS = REGISTRY.register(Counter(
+    "openai_requests_total", "OpenAI API calls, by model, operation and outcome.", ("model", "operation", "status")))
+OPENAI_DURATION = REGISTRY.register(Histogram(
+    "openai_request_duration_seconds", "Latency of OpenAI API calls (until the last chunk for streams).",
+    ("model", "operation"), buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)))
+OPENAI_TOKENS = REGISTRY.register(Counter(
+    "openai_tokens_total", "Tokens reported by OpenAI, by model and kind (prompt or completion).", ("model", "kind")))
+OPENAI_HEDGES = REGISTRY.register(Counter(
+    "openai_extra_attempts_total", "Completion attempts started because the previous one was slow (hedge) "
+    "or failed (fallback), by model.", ("model", "reason")))
+MONGO_OPERATIONS = REGISTRY.register(Counter(
+    "mongo_operations_total", "MongoDB commands, by command, collection and outcome.", ("command", "collection", "status")))
+MONGO_DURATION = REGISTRY.register(Histogram(
+    "mongo_operation_duration_seconds", "Latency of MongoDB commands.", ("command", "collection")))
+JOBS = REGISTRY.register(Counter(
+    "jobs_total", "Background jobs finished, by type and final status.", ("type", "status")))
+JOB_DURATION = REGISTRY.register(Histogram(
+    "job_duration_seconds", "Time a background job attempt took.", ("type", "status"),
+    buckets=(1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)))
+
+
+# ----------------------------------------------------------------
+# Trace spans
+# ----------------------------------------------------------------
+
+class Trace:
+    """The upstream calls made while serving one request or running one job."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def add(self, category: str, name: str, duration: float):
+        self.spans.append({"category": category, "name": name,
+                           "start_ms": round((time.perf_counter() - duration - self.started) * 1000, 2),
+                           "duration_ms": round(duration * 1000, 2)})
+
+    def summary(self) -> dict:
+        """Total time and call count per category (github, openai, mongo)."""
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span["category"], {"calls": 0, "duration_ms": 0.0})
+            total["calls"] += 1
+            total["duration_ms"] = round(total["duration_ms"] + span["duration_ms"], 2)
+        return totals
+
+    def slowest(self, limit: int = 20) -> list:
+        """The limit slowest spans, in the order they started, to show which calls made a request slow."""
+        spans = sorted(self.spans, key=lambda span: span["duration_ms"], reverse=True)[:limit]
+        return sorted(spans, key=lambda span: span["start_ms"])
+
+    def server_timing(self) -> str:
+        """Render the summary as a Server-Timing header value."""
+        return ", ".join(f'{category};dur={total["duration_ms"]};desc="{total["calls"]} calls"'
+                         for category, total in self.summary().items())
+
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def start_trace():
+    trace = Trace()
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+def record_span(category: str, name: str, duration: float):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(category, name, duration)
+
+
+# ----------------------------------------------------------------
+# Upstream call recorders
+# ----------------------------------------------------------------
+
+GITHUB_ROUTE_PATTERNS = [
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"/(issues|milestones|hooks|pulls|commits)/\d+"), r"/\1/{number}"),
+    (re.compile(r"/git/(refs|ref)/.+$"), r"/git/\1/{ref}"),
+    (re.compile(r"/git/(trees|commits|blobs)/[0-9a-f]{7,40}$"), r"/git/\1/{sha}"),
+    (re.compile(r"^/users/[^/]+"), "/users/{username}"),
+]
+
+
+def github_route_template(path: str) -> str:
+    """Collapse an API path such as /repos/alice/app/issues/12 into /repos/{owner}/{repo}/issues/{number}."""
+    for pattern, replacement in GITHUB_ROUTE_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def observe_github(method: str, path: str, status, duration: float):
+    route = github_route_template(path)
+    GITHUB_REQUESTS.inc(method, route, str(status))
+    GITHUB_DURATION.observe(duration, method, route)
+    record_span("github", f"{method} {route}", duration)
+
+
+def observe_openai(model: str, operation: str, status: str, duration: float, usage=None):
+    OPENAI_REQUESTS.inc(model, operation, status)
+    OPENAI_DURATION.observe(duration, model, operation)
+    if usage is not None:
+        OPENAI_TOKENS.inc(model, "prompt", amount=usage.prompt_tokens or 0)
+        OPENAI_TOKENS.inc(model, "completion", amount=usage.completion_tokens or 0)
+    record_span("openai", f"{operation} {model}", duration)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording the latency and outcome of every MongoDB command."""
+
+    def __init__(self):
+        self._collections = {}
+
+    @staticmethod
+    def _key(event):
+        return event.request_id, event.connection_id
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[self._key(event)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event, status: str):
+        collection = self._collections.pop(self._key(event), "")
+        duration = event.duration_micros / 1_000_000
+        MONGO_OPERATIONS.inc(event.command_name, collection, status)
+        MONGO_DURATION.observe(duration, event.command_name, collection)
+        record_span("mongo", f"{event.command_name} {collection}".strip(), duration)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+def route_template(request) -> Optional[str]:
+    """The path template of the FastAPI route that handled a request, once routing has happened."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None)
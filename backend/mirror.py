@@ -0,0 +1,219 @@
+import hmac
+import hashlib
+import datetime
+from typing import Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# ----------------------------------------------------------------
+# Webhook-fed MongoDB mirror of milestones and issues
+# ----------------------------------------------------------------
+
+MIRRORED_EVENTS = ("ping", "milestone", "issues")
+
+
+def verify_webhook_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check the X-Hub-Signature-256 header GitHub sends with every webhook delivery."""
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def repo_key(owner: str, repo: str) -> dict:
+    return {"owner": owner.lower(), "repo": repo.lower()}
+
+
+def milestone_from_graphql(node: dict) -> dict:
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "state": node["state"].lower(),
+        "description": node["description"],
+        "due_on": node.get("dueOn"),
+        "updated_at": node.get("updatedAt"),
+    }
+
+
+def issue_from_graphql(node: dict, milestone_number: int) -> dict:
+    state = node["state"].lower()
+    return {
+        "number": node["number"],
+        "milestone_number": milestone_number,
+        "title": node["title"],
+        "state": state,
+        "created_at": node["createdAt"],
+        "closed_at": node["closedAt"] if state == "closed" else None,
+        "updated_at": node.get("updatedAt"),
+    }
+
+
+def milestone_from_rest(payload: dict) -> dict:
+    return {
+        "number": payload["number"],
+        "title": payload["title"],
+        "state": payload["state"],
+        "description": payload.get("description"),
+        "due_on": payload.get("due_on"),
+        "updated_at": payload.get("updated_at"),
+    }
+
+
+def issue_from_rest(payload: dict) -> dict:
+    milestone = payload.get("milestone")
+    return {
+        "number": payload["number"],
+        "milestone_number": milestone["number"] if milestone else None,
+        "title": payload["title"],
+        "state": payload["state"],
+        "created_at": payload.get("created_at"),
+        "closed_at": payload.get("closed_at") if payload["state"] == "closed" else None,
+        "updated_at": payload.get("updated_at"),
+    }
+
+
+class RepositoryMirror:
+    """
+    Local copy of the milestones and issues of provisioned repositories.
+
+    A repository is seeded from a live GraphQL fetch and then kept current by GitHub webhook
+    deliveries (plus write-through from our own updates). Reads are only served from the mirror
+    while it is "warm": seeded within the last max_staleness seconds, and known to receive
+    deliveries for that repository. The periodic re-seed bounds how stale the mirror can get
+    when deliveries stop (e.g. the webhook was deleted or GitHub dropped events).
+    Writes carry GitHub's updated_at and never overwrite a newer copy of an item.
+    """
+
+    def __init__(self, db, max_staleness: float = 900):
+        self.max_staleness = datetime.timedelta(seconds=max_staleness)
+        self.repos = db["mirrorrepos"]
+        self.milestones = db["mirrormilestones"]
+        self.issues = db["mirrorissues"]
+
+    async def ensure_indexes(self):
+        await self.milestones.create_index([("owner", 1), ("repo", 1), ("number", 1)], unique=True)
+        await self.issues.create_index([("owner", 1), ("repo", 1), ("number", 1)], unique=True)
+        await self.issues.create_index([("owner", 1), ("repo", 1), ("milestone_number", 1), ("state", 1)])
+
+    async def is_warm(self, owner: str, repo: str) -> bool:
+        state = await self.repos.find_one({"_id": f"{owner.lower()}/{repo.lower()}"})
+        if not state or not state.get("seeded_at") or not state.get("webhook_active"):
+            return False
+        seeded_at = state["seeded_at"]
+        if seeded_at.tzinfo is None:  # MongoDB returns naive UTC datetimes by default.
+            seeded_at = seeded_at.replace(tzinfo=datetime.timezone.utc)
+        return datetime.datetime.now(datetime.timezone.utc) - seeded_at < self.max_staleness
+
+    async def _mark(self, owner: str, repo: str, fields: dict):
+        await self.repos.update_one(
+            {"_id": f"{owner.lower()}/{repo.lower()}"},
+            {"$set": {**repo_key(owner, repo), **fields}},
+            upsert=True
+        )
+
+    async def _upsert(self, collection, owner: str, repo: str, documents: list):
+        """Upsert items unless the mirror already holds a newer version of them."""
+        if not documents:
+            return
+        operations = []
+        for document in documents:
+            selector = {**repo_key(owner, repo), "number": document["number"]}
+            if document.get("updated_at"):
+                selector["$or"] = [
+                    {"updated_at": None},
+                    {"updated_at": {"$lte": document["updated_at"]}},
+                ]
+            operations.append(UpdateOne(selector, {"$set": {**repo_key(owner, repo), **document}}, upsert=True))
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # A duplicate key means the stored item is newer than this one, which is expected.
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+    async def seed(self, owner: str, repo: str, milestones: list):
+        """
+        Replace the mirror of a repository with a live fetch.
+        milestones is a list of (GraphQL milestone node, list of GraphQL issue nodes).
+        """
+        milestone_documents = [milestone_from_graphql(node) for node, _ in milestones]
+        issue_documents = [
+            issue_from_graphql(issue, node["number"]) for node, issues in milestones for issue in issues
+        ]
+        await self._upsert(self.milestones, owner, repo, milestone_documents)
+        await self._upsert(self.issues, owner, repo, issue_documents)
+        await self.milestones.delete_many(
+            {**repo_key(owner, repo), "number": {"$nin": [document["number"] for document in milestone_documents]}}
+        )
+        # Issues without a milestone are not part of a live fetch, so only prune milestoned ones.
+        await self.issues.delete_many(
+            {**repo_key(owner, repo), "milestone_number": {"$ne": None},
+             "number": {"$nin": [document["number"] for document in issue_documents]}}
+        )
+        await self._mark(owner, repo, {"seeded_at": datetime.datetime.now(datetime.timezone.utc)})
+
+    async def read(self, owner: str, repo: str) -> list:
+        """Build the /fetch-milestones response shape from the mirror."""
+        milestones = await self.milestones.find(repo_key(owner, repo)).to_list(length=None)
+        issues = await self.issues.find({**repo_key(owner, repo), "milestone_number": {"$ne": None}}).to_list(length=None)
+        issues_by_milestone = {}
+        for issue in sorted(issues, key=lambda issue: issue["created_at"] or "", reverse=True):
+            issues_by_milestone.setdefault(issue["milestone_number"], []).append({
+                "number": issue["number"],
+                "title": issue["title"],
+                "state": issue["state"],
+                "created_at": issue["created_at"],
+                "closed_at": issue["closed_at"],
+            })
+        milestones.sort(key=lambda milestone: (milestone["due_on"] is None, milestone["due_on"] or "", milestone["number"]))
+        return [
+            {
+                "milestone": {
+                    "number": milestone["number"],
+                    "title": milestone["title"],
+                    "state": milestone["state"],
+                    "description": milestone["description"],
+                    "due_on": milestone["due_on"],
+                },
+                "issues": issues_by_milestone.get(milestone["number"], []),
+            }
+            for milestone in milestones
+        ]
+
+    async def milestone_all_closed(self, owner: str, repo: str, milestone_number: int) -> bool:
+        open_issue = await self.issues.find_one(
+            {**repo_key(owner, repo), "milestone_number": milestone_number, "state": "open"}
+        )
+        return open_issue is None
+
+    async def apply_issue(self, owner: str, repo: str, payload: dict):
+        """Write through an issue returned by the REST API (our own update or a webhook delivery)."""
+        if "pull_request" in payload:
+            return
+        await self._upsert(self.issues, owner, repo, [issue_from_rest(payload)])
+
+    async def apply_milestone(self, owner: str, repo: str, payload: dict):
+        await self._upsert(self.milestones, owner, repo, [milestone_from_rest(payload)])
+
+    async def apply_event(self, event: str, payload: dict):
+        """Apply one webhook delivery to the mirror."""
+        repository = payload.get("repository")
+        if event not in MIRRORED_EVENTS or not repository:
+            return
+        owner, repo = repository["owner"]["login"], repository["name"]
+        action = payload.get("action")
+        if event == "milestone":
+            if action == "deleted":
+                number = payload["milestone"]["number"]
+                await self.milestones.delete_one({**repo_key(owner, repo), "number": number})
+                await self.issues.update_many({**repo_key(owner, repo), "milestone_number": number},
+                                              {"$set": {"milestone_number": None}})
+            else:
+                await self.apply_milestone(owner, repo, payload["milestone"])
+        elif event == "issues":
+            if action in ("deleted", "transferred"):
+                await self.issues.delete_one({**repo_key(owner, repo), "number": payload["issue"]["number"]})
+            else:
+                await self.apply_issue(owner, repo, payload["issue"])
+        await self._mark(owner, repo, {"webhook_active": True,
+                                       "last_delivery_at": datetime.datetime.now(datetime.timezone.utc)})
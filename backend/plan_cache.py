@@ -0,0 +1,111 @@
+import re
+import json
+import hashlib
+import asyncio
+import logging
+import datetime
+from typing import Optional
+from pymongo.errors import PyMongoError
+from backend.cache import TTLCache
+
+# ----------------------------------------------------------------
+# Project plan cache (in-process LRU in front of a MongoDB collection)
+# ----------------------------------------------------------------
+
+logger = logging.getLogger("backend.plan_cache")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lower-case and collapse whitespace so trivially different inputs share a cache entry."""
+    return re.sub(r"\s+", " ", value or "").strip().lower()
+
+
+def plan_cache_key(description: str,
+                   features: str,
+                   duration: str,
+                   hours_per_day: int,
+                   tech_stack: Optional[str] = None) -> str:
+    """Hash the normalized generation inputs into a stable cache key."""
+    normalized = {
+        "description": normalize_text(description),
+        "features": normalize_text(features),
+        "duration": normalize_text(duration),
+        "hours_per_day": int(hours_per_day),
+        "tech_stack": normalize_text(tech_stack),
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    Two-level cache for generated project plans.
+
+    Lookups hit an in-process TTL/LRU cache first and fall back to a MongoDB collection whose
+    documents are expired by a TTL index on created_at. MongoDB failures are treated as misses
+    so that the cache can never break plan generation.
+    """
+
+    def __init__(self, collection, memory_size: int, ttl_seconds: int):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(memory_size, ttl_seconds)
+        self._index_ready = False
+        self._index_lock = asyncio.Lock()
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    async def ensure_index(self):
+        """Create the TTL index on first use rather than at import time."""
+        if self._index_ready:
+            return
+        async with self._index_lock:
+            if not self._index_ready:
+                await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+                self._index_ready = True
+
+    async def get(self, key: str) -> Optional[dict]:
+        plan = self.memory.get(key)
+        if plan is not None:
+            self.memory_hits += 1
+            return plan
+        try:
+            await self.ensure_index()
+            document = await self.collection.find_one({"_id": key}, {"plan": 1})
+        except PyMongoError as e:
+            logger.warning("plan cache lookup failed", extra={"error": str(e)})
+            document = None
+        if document is None:
+            self.misses += 1
+            return None
+        self.mongo_hits += 1
+        self.memory.set(key, document["plan"])
+        return document["plan"]
+
+    async def set(self, key: str, plan: dict):
+        self.memory.set(key, plan)
+        try:
+            await self.ensure_index()
+            await self.collection.replace_one(
+                {"_id": key},
+                {"plan": plan, "created_at": datetime.datetime.now(datetime.timezone.utc)},
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.warning("plan cache write failed", extra={"error": str(e)})
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.mongo_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory": self.memory.stats(),
+        }
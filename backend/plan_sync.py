@@ -0,0 +1,157 @@
+from backend.planner import normalize_title
+
+# ----------------------------------------------------------------
+# Diffing an edited project plan against an existing repository
+# ----------------------------------------------------------------
+#
+# Milestones and issues of the plan are matched to the repository by number when the plan carries
+# one (as returned by /fetch-milestones), otherwise by title (for issues, first within the milestone
+# their planned milestone matched). Only the differences become operations:
+#
+#   {"action": "create", "kind": "milestone", "title", "description", "due_date"}
+#   {"action": "update", "kind": "milestone", "number", "title", "changes": {...}}
+#   {"action": "close",  "kind": "milestone", "number", "title"}
+#   {"action": "create", "kind": "issue", "milestone_title", "milestone_number", "title", "description"}
+#   {"action": "update", "kind": "issue", "number", "title", "changes": {...}[, "milestone_number"]}
+#   {"action": "close",  "kind": "issue", "number", "title"}
+#
+# Changes use plan field names (title, description, due_date, milestone_title, state), so a dry run
+# reads like the plan itself. Issue operations that set a milestone carry the number of the existing
+# milestone it was matched to, or None when that milestone is created by the same sync (it is then
+# looked up by its planned title), so renaming a milestone never misplaces its issues.
+
+
+def same_text(a, b) -> bool:
+    """Compare descriptions ignoring line endings and surrounding whitespace."""
+    return (a or "").replace("\r\n", "\n").strip() == (b or "").replace("\r\n", "\n").strip()
+
+
+def same_due_date(plan_due_date, due_on) -> bool:
+    """A plan due date (YYYY-MM-DD) against GitHub's dueOn timestamp; only the date part counts."""
+    return (plan_due_date or None) == (due_on[:10] if due_on else None)
+
+
+def match_by_number(planned: list, existing: list, matches: list, used: set):
+    """Fill matches[index] for the planned items that carry the number of an unused existing item."""
+    by_number = {item["number"]: item for item in existing}
+    for index, item in enumerate(planned):
+        match = by_number.get(item.get("number"))
+        if matches[index] is None and match is not None and match["number"] not in used:
+            matches[index] = match
+            used.add(match["number"])
+
+
+def match_by_title(planned: list, existing: list, matches: list, used: set, indexes=None):
+    """Fill matches[index] for the still unmatched planned items (only those in indexes, if given) by title."""
+    by_title = {}
+    for item in existing:
+        by_title.setdefault(normalize_title(item["title"]), []).append(item)
+    for index in range(len(planned)) if indexes is None else indexes:
+        if matches[index] is not None:
+            continue
+        candidates = [candidate for candidate in by_title.get(normalize_title(planned[index]["title"]), [])
+                      if candidate["number"] not in used]
+        if candidates:
+            matches[index] = candidates[0]
+            used.add(candidates[0]["number"])
+
+
+def match_items(planned: list, existing: list) -> list:
+    """
+    Pair every planned item with an existing one (or None): by number first, then by title.
+    Each existing item is used at most once. Items are dicts with "number" (optional for planned) and "title".
+    """
+    matches = [None] * len(planned)
+    used = set()
+    match_by_number(planned, existing, matches, used)
+    match_by_title(planned, existing, matches, used)
+    return matches
+
+
+def match_issues(planned_issues: list, issues: list, milestone_numbers: dict) -> list:
+    """
+    Pair planned issues ((planned milestone, issue) tuples) with existing issues: by number, then by
+    title within the existing milestone their planned milestone matched, and only then by title across
+    the repository, so that moving an issue to another milestone is an update while repeated titles
+    such as "Setup" stay with their own milestone.
+    """
+    planned = [issue for _, issue in planned_issues]
+    matches = [None] * len(planned)
+    used = set()
+    match_by_number(planned, issues, matches, used)
+    indexes_by_milestone = {}
+    for index, (milestone, _) in enumerate(planned_issues):
+        if milestone_numbers[id(milestone)] is not None:
+            indexes_by_milestone.setdefault(milestone_numbers[id(milestone)], []).append(index)
+    for number, indexes in indexes_by_milestone.items():
+        match_by_title(planned, [issue for issue in issues if issue["milestone_number"] == number],
+                       matches, used, indexes)
+    match_by_title(planned, issues, matches, used)
+    return matches
+
+
+def diff_plan(current: list, project_data: dict) -> list:
+    """
+    Compute the operations that turn a repository into project_data.
+
+    current is a live fetch with issue bodies: a list of (GraphQL milestone node, list of GraphQL
+    issue nodes). Existing items the plan no longer contains are closed, never deleted; issues are
+    closed as not planned. Issues without a milestone are left alone.
+    """
+    milestones = [node for node, _ in current]
+    issues = [dict(issue, milestone_number=node["number"]) for node, nodes in current for issue in nodes]
+    planned_milestones = project_data.get("milestones", [])
+    milestone_matches = match_items(planned_milestones, milestones)
+    milestone_numbers = {id(milestone): match["number"] if match else None
+                         for milestone, match in zip(planned_milestones, milestone_matches)}
+    planned_issues = [(milestone, issue) for milestone in planned_milestones for issue in milestone.get("issues", [])]
+    issue_matches = match_issues(planned_issues, issues, milestone_numbers)
+
+    operations = []
+    for milestone, match in zip(planned_milestones, milestone_matches):
+        if match is None:
+            operations.append({"action": "create", "kind": "milestone", "title": milestone["title"],
+                               "description": milestone.get("description", ""),
+                               "due_date": milestone.get("due_date")})
+            continue
+        changes = {}
+        if match["title"] != milestone["title"]:
+            changes["title"] = milestone["title"]
+        if not same_text(match["description"], milestone.get("description")):
+            changes["description"] = milestone.get("description", "")
+        if "due_date" in milestone and not same_due_date(milestone["due_date"], match.get("dueOn")):
+            changes["due_date"] = milestone["due_date"]
+        if changes:
+            operations.append({"action": "update", "kind": "milestone", "number": match["number"],
+                               "title": milestone["title"], "changes": changes})
+
+    for (milestone, issue), match in zip(planned_issues, issue_matches):
+        if match is None:
+            operations.append({"action": "create", "kind": "issue", "milestone_title": milestone["title"],
+                               "milestone_number": milestone_numbers[id(milestone)],
+                               "title": issue["title"], "description": issue.get("description", "")})
+            continue
+        changes = {}
+        if match["title"] != issue["title"]:
+            changes["title"] = issue["title"]
+        if not same_text(match.get("body"), issue.get("description")):
+            changes["description"] = issue.get("description", "")
+        if match["milestone_number"] != milestone_numbers[id(milestone)]:
+            changes["milestone_title"] = milestone["title"]
+        if changes:
+            operation = {"action": "update", "kind": "issue", "number": match["number"],
+                         "title": issue["title"], "changes": changes}
+            if "milestone_title" in changes:
+                operation["milestone_number"] = milestone_numbers[id(milestone)]
+            operations.append(operation)
+
+    kept_issues = {match["number"] for match in issue_matches if match is not None}
+    for issue in issues:
+        if issue["number"] not in kept_issues and issue["state"].lower() == "open":
+            operations.append({"action": "close", "kind": "issue", "number": issue["number"], "title": issue["title"]})
+    kept_milestones = {match["number"] for match in milestone_matches if match is not None}
+    for milestone in milestones:
+        if milestone["number"] not in kept_milestones and milestone["state"].lower() == "open":
+            operations.append({"action": "close", "kind": "milestone", "number": milestone["number"],
+                               "title": milestone["title"]})
+    return operations
@@ -0,0 +1,338 @@
+import re
+import json
+import datetime
+from typing import Optional
+
+# ----------------------------------------------------------------
+# Project plan prompt and tool schema
+# ----------------------------------------------------------------
+
+PLAN_MODEL = "gpt-4o-mini"
+
+PROJECT_PLAN_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "generate_project_summary",
+        "description": "Takes project details and generates a summary, milestones, and detailed issues with step-by-step instructions.",
+        "parameters": {
+            "type": "object",
+            "required": ["summary", "milestones"],
+            "properties": {
+                "summary": {
+                    "type": "string",
+                    "description": "Summary of the user's project description and features"
+                },
+                "milestones": {
+                    "type": "array",
+                    "description": "List of GitHub milestones with their issues",
+                    "items": {
+                        "type": "object",
+                        "required": ["title", "description", "due_date", "issues"],
+                        "properties": {
+                            "title": {"type": "string", "description": "Title of the milestone"},
+                            "description": {"type": "string",
+                                            "description": "Brief description of the milestone"},
+                            "due_date": {"type": "string",
+                                         "description": "Estimated due date (YYYY-MM-DD)"},
+                            "issues": {
+                                "type": "array",
+                                "description": "List of GitHub issues under this milestone",
+                                "items": {
+                                    "type": "object",
+                                    "required": ["title", "description"],
+                                    "properties": {
+                                        "title": {"type": "string",
+                                                  "description": "Title of the issue/task"},
+                                        "description": {"type": "string",
+                                                        "description": "Step-by-step instructions on how to complete this issue"}
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+PROJECT_PLAN_TOOL_CHOICE = {"type": "function", "function": {"name": "generate_project_summary"}}
+
+# Two-phase generation: a compact skeleton first, then the instructions of every milestone in parallel.
+PLAN_SKELETON_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "generate_project_skeleton",
+        "description": "Takes project details and generates a summary and milestones with the titles of their issues.",
+        "parameters": {
+            "type": "object",
+            "required": ["summary", "milestones"],
+            "properties": {
+                "summary": {
+                    "type": "string",
+                    "description": "Summary of the user's project description and features"
+                },
+                "milestones": {
+                    "type": "array",
+                    "description": "List of GitHub milestones with the titles of their issues",
+                    "items": {
+                        "type": "object",
+                        "required": ["title", "description", "due_date", "issues"],
+                        "properties": {
+                            "title": {"type": "string", "description": "Title of the milestone"},
+                            "description": {"type": "string",
+                                            "description": "Brief description of the milestone"},
+                            "due_date": {"type": "string",
+                                         "description": "Estimated due date (YYYY-MM-DD)"},
+                            "issues": {
+                                "type": "array",
+                                "description": "Titles of the GitHub issues under this milestone",
+                                "items": {"type": "string", "description": "Title of the issue/task"}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+PLAN_SKELETON_TOOL_CHOICE = {"type": "function", "function": {"name": "generate_project_skeleton"}}
+
+MILESTONE_ISSUES_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "expand_milestone_issues",
+        "description": "Writes step-by-step instructions for every issue of one milestone.",
+        "parameters": {
+            "type": "object",
+            "required": ["issues"],
+            "properties": {
+                "issues": {
+                    "type": "array",
+                    "description": "One entry per issue, in the order given",
+                    "items": {
+                        "type": "object",
+                        "required": ["title", "description"],
+                        "properties": {
+                            "title": {"type": "string",
+                                      "description": "Title of the issue/task, unchanged"},
+                            "description": {"type": "string",
+                                            "description": "Step-by-step instructions on how to complete this issue"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+MILESTONE_ISSUES_TOOL_CHOICE = {"type": "function", "function": {"name": "expand_milestone_issues"}}
+
+
+def project_brief(description: str,
+                  features: str,
+                  duration: str,
+                  hours_per_day: int,
+                  tech_stack: Optional[str] = None) -> str:
+    return f"""
+    ### Project Description:
+    {description}
+
+    ### Features:
+    {features}
+
+    ### Expected Project Duration (in weeks):
+    {duration}
+
+    ### Number of Hours Per Day the User Will Work:
+    {hours_per_day}
+
+    ### Tech Stack (optional):
+    {tech_stack}
+    """
+
+
+def build_plan_messages(description: str,
+                        features: str,
+                        duration: str,
+                        hours_per_day: int,
+                        tech_stack: Optional[str] = None) -> list:
+    """Build the chat messages asking the model for a project summary, milestones and issues."""
+    return [
+        {
+            "role": "system",
+            "content": "You are an AI product manager. Generate a project summary, milestones, and issues with "
+                       "step-by-step instructions. Be as technical as you can when generating the milestones and issues. "
+                       f"Today's date is {datetime.date.today().strftime('%Y-%m-%d')}"
+        },
+        {
+            "role": "user",
+            "content": project_brief(description, features, duration, hours_per_day, tech_stack)
+        }
+    ]
+
+
+def build_skeleton_messages(description: str,
+                            features: str,
+                            duration: str,
+                            hours_per_day: int,
+                            tech_stack: Optional[str] = None) -> list:
+    """Build the chat messages asking for the plan outline: summary, milestones and issue titles only."""
+    return [
+        {
+            "role": "system",
+            "content": "You are an AI product manager. Generate a project summary and milestones, each with the "
+                       "titles of its issues. Do not write instructions for the issues yet. Be as technical as you "
+                       "can when choosing the milestones and issues. "
+                       f"Today's date is {datetime.date.today().strftime('%Y-%m-%d')}"
+        },
+        {
+            "role": "user",
+            "content": project_brief(description, features, duration, hours_per_day, tech_stack)
+        }
+    ]
+
+
+def build_milestone_issues_messages(description: str,
+                                    features: str,
+                                    duration: str,
+                                    hours_per_day: int,
+                                    tech_stack: Optional[str],
+                                    skeleton: dict,
+                                    index: int) -> list:
+    """Build the chat messages asking for the step-by-step instructions of one milestone of a skeleton."""
+    milestone = skeleton["milestones"][index]
+    outline = "\n".join(f"    {number}. {other['title']} (due {other['due_date']})"
+                        for number, other in enumerate(skeleton["milestones"], start=1))
+    issues = "\n".join(f"    {number}. {title}" for number, title in enumerate(milestone["issues"], start=1))
+    return [
+        {
+            "role": "system",
+            "content": "You are an AI product manager. Write step-by-step instructions for every issue of one "
+                       "milestone of a project plan. Keep the issue titles and their order unchanged. "
+                       "Be as technical as you can. "
+                       f"Today's date is {datetime.date.today().strftime('%Y-%m-%d')}"
+        },
+        {
+            "role": "user",
+            "content": project_brief(description, features, duration, hours_per_day, tech_stack) + f"""
+    ### Project Summary:
+    {skeleton["summary"]}
+
+    ### All Milestones:
+{outline}
+
+    ### Milestone To Detail:
+    {milestone["title"]} (due {milestone["due_date"]}): {milestone["description"]}
+
+    ### Issues Of This Milestone:
+{issues}
+    """
+        }
+    ]
+
+
+def normalize_title(title: str) -> str:
+    return re.sub(r"\s+", " ", title or "").strip().lower()
+
+
+def merge_milestone_issues(milestone: dict, expanded_issues: list) -> dict:
+    """
+    Combine a skeleton milestone with its expanded issues into the generate_project_summary schema.
+    Instructions are matched by title, falling back to position when the model reworded a title.
+    """
+    by_title = {normalize_title(issue.get("title")): position for position, issue in enumerate(expanded_issues)}
+    matches = [by_title.get(normalize_title(title)) for title in milestone["issues"]]
+    unmatched = iter(sorted(set(range(len(expanded_issues))) - set(matches)))
+    issues = []
+    for title, position in zip(milestone["issues"], matches):
+        if position is None:
+            position = next(unmatched, None)
+        description = expanded_issues[position].get("description", "") if position is not None else ""
+        issues.append({"title": title, "description": description})
+    return {
+        "title": milestone["title"],
+        "description": milestone["description"],
+        "due_date": milestone["due_date"],
+        "issues": issues,
+    }
+
+
+# ----------------------------------------------------------------
+# Incremental parsing of streamed tool-call arguments
+# ----------------------------------------------------------------
+
+class PlanStreamParser:
+    """
+    Incrementally scans the JSON arguments of a streamed generate_project_summary tool call.
+
+    Fragments are fed in as they arrive. The parser reports the summary as soon as its string is
+    complete, and each milestone as soon as its object is closed, without waiting for the rest of
+    the document.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.expect_key = False
+        self.last_key = None
+        self.current_key = None
+        self.milestone_start = None
+        self.milestone_count = 0
+
+    def feed(self, fragment: str) -> list:
+        """Consume a fragment and return the list of (event, payload) pairs it completed."""
+        events = []
+        self.buffer += fragment
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    self._end_string(events)
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.position
+            elif char in "{[":
+                self.depth += 1
+                if char == "{" and self.depth == 1:
+                    self.expect_key = True
+                if char == "{" and self.depth == 3 and self.current_key == "milestones":
+                    self.milestone_start = self.position
+            elif char in "}]":
+                if char == "}" and self.depth == 3 and self.milestone_start is not None:
+                    milestone = json.loads(self.buffer[self.milestone_start:self.position + 1])
+                    events.append(("milestone", {"index": self.milestone_count, "milestone": milestone}))
+                    self.milestone_count += 1
+                    self.milestone_start = None
+                self.depth -= 1
+            elif self.depth == 1:
+                if char == ":":
+                    self.current_key = self.last_key
+                    self.expect_key = False
+                elif char == ",":
+                    self.expect_key = True
+            self.position += 1
+        return events
+
+    def _end_string(self, events: list):
+        if self.depth != 1:
+            return
+        value = json.loads(self.buffer[self.string_start:self.position + 1])
+        if self.expect_key:
+            self.last_key = value
+        elif self.current_key == "summary":
+            events.append(("summary", {"summary": value}))
+
+    def result(self) -> dict:
+        """Parse the complete arguments once the stream has finished."""
+        return json.loads(self.buffer)
@@ -0,0 +1,181 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# ----------------------------------------------------------------
+# Per-token GitHub rate-limit governor
+# ----------------------------------------------------------------
+
+# Once a token has this few requests left in a window, requests are spread over the time until reset.
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "100"))
+# Longest a single request is held back (pacing, cooldown or retry backoff) before it is sent anyway.
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "60"))
+GITHUB_RETRY_BASE_DELAY = float(os.getenv("GITHUB_RETRY_BASE_DELAY", "0.5"))
+GITHUB_RATE_LIMIT_TRACKED_TOKENS = int(os.getenv("GITHUB_RATE_LIMIT_TRACKED_TOKENS", "1024"))
+# Spacing between writes of one token grows by this much after each secondary limit and decays on success.
+GITHUB_WRITE_BACKOFF_STEP = float(os.getenv("GITHUB_WRITE_BACKOFF_STEP", "1.0"))
+
+MUTATING_METHODS = ("POST", "PATCH", "PUT", "DELETE")
+
+
+def rate_limit_resource(url: str) -> str:
+    """Guess which rate-limit bucket a request is charged to before GitHub tells us."""
+    if url.endswith("/graphql"):
+        return "graphql"
+    if "/search/" in url:
+        return "search"
+    return "core"
+
+
+def rate_limit_delay(response) -> Optional[float]:
+    """
+    Return how many seconds to wait before retrying a rate-limited GitHub response,
+    or None if the response was not rate limited.
+    """
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 1.0)
+        except ValueError:
+            return 60.0
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset_at = response.headers.get("X-RateLimit-Reset")
+        try:
+            return max(float(reset_at) - time.time(), 1.0)
+        except (TypeError, ValueError):
+            return 60.0
+    if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+        return 60.0
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so parallel workers do not all retry in the same instant."""
+    return random.uniform(0, min(GITHUB_RETRY_BASE_DELAY * 2 ** attempt, GITHUB_RATE_LIMIT_MAX_WAIT))
+
+
+class TokenBudget:
+    """What GitHub last told us about one token, plus the pacing state derived from it."""
+
+    def __init__(self):
+        self.resources = {}
+        self.next_request_at = {}
+        self.cooldown_until = 0.0
+        self.write_interval = 0.0
+        self.next_write_at = 0.0
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "resources": {name: dict(budget) for name, budget in self.resources.items()},
+            "cooldown_seconds": max(self.cooldown_until - now, 0.0),
+            "write_interval": self.write_interval,
+        }
+
+
+class RateLimitGovernor:
+    """
+    Tracks GitHub's rate-limit headers per token and paces requests before a limit is hit.
+
+    Requests are held back when a token's remaining budget drops below a reserve (spread evenly
+    over the time left until the window resets), and every request of a token waits out a
+    cooldown after a secondary limit. Writes of a token are additionally spaced out by an
+    interval that grows after secondary limits and decays again while writes succeed.
+    """
+
+    def __init__(self,
+                 reserve: int = GITHUB_RATE_LIMIT_RESERVE,
+                 max_wait: float = GITHUB_RATE_LIMIT_MAX_WAIT,
+                 max_tokens: int = GITHUB_RATE_LIMIT_TRACKED_TOKENS):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.max_tokens = max_tokens
+        self._budgets = OrderedDict()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def _budget(self, fingerprint: str) -> TokenBudget:
+        budget = self._budgets.get(fingerprint)
+        if budget is None:
+            budget = self._budgets[fingerprint] = TokenBudget()
+            while len(self._budgets) > self.max_tokens:
+                self._budgets.popitem(last=False)
+        self._budgets.move_to_end(fingerprint)
+        return budget
+
+    def _reserve_slot(self, fingerprint: str, method: str, resource: str) -> float:
+        """Work out how long this request must wait, and claim its share of the budget."""
+        now = time.time()
+        with self._lock:
+            budget = self._budget(fingerprint)
+            wait = max(budget.cooldown_until - now, 0.0)
+            known = budget.resources.get(resource)
+            if known is not None and known["reset"] > now:
+                if known["remaining"] <= 0:
+                    wait = max(wait, known["reset"] - now)
+                elif known["remaining"] <= self.reserve:
+                    # Hand out evenly spaced send slots until the window resets.
+                    slot = max(budget.next_request_at.get(resource, 0.0), now + wait)
+                    budget.next_request_at[resource] = slot + (known["reset"] - now) / known["remaining"]
+                    wait = slot - now
+                # Count the request now so concurrent callers see the budget shrink.
+                known["remaining"] -= 1
+            if method in MUTATING_METHODS and budget.write_interval:
+                slot = max(budget.next_write_at, now + wait)
+                budget.next_write_at = slot + budget.write_interval
+                wait = slot - now
+        return min(wait, self.max_wait)
+
+    async def acquire(self, fingerprint: str, method: str, resource: str):
+        wait = self._reserve_slot(fingerprint, method, resource)
+        if wait > 0:
+            self.throttled += 1
+            self.throttled_seconds += wait
+            await asyncio.sleep(wait)
+
+    def record(self, fingerprint: str, method: str, response):
+        """Update a token's budget from the X-RateLimit-* headers of a response."""
+        headers = response.headers
+        with self._lock:
+            budget = self._budget(fingerprint)
+            if "X-RateLimit-Remaining" in headers:
+                try:
+                    budget.resources[headers.get("X-RateLimit-Resource", "core")] = {
+                        "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                        "remaining": int(headers["X-RateLimit-Remaining"]),
+                        "used": int(headers.get("X-RateLimit-Used", 0)),
+                        "reset": float(headers.get("X-RateLimit-Reset", 0)),
+                    }
+                except ValueError:
+                    pass
+            if method in MUTATING_METHODS and response.status_code < 400 and budget.write_interval:
+                budget.write_interval = budget.write_interval * 0.9 if budget.write_interval > 0.05 else 0.0
+
+    def record_rate_limited(self, fingerprint: str, method: str, delay: float):
+        """Hold every request of a token back after GitHub rejected one with a rate limit."""
+        self.rate_limited += 1
+        with self._lock:
+            budget = self._budget(fingerprint)
+            budget.cooldown_until = max(budget.cooldown_until, time.time() + delay)
+            if method in MUTATING_METHODS:
+                budget.write_interval += GITHUB_WRITE_BACKOFF_STEP
+
+    def stats(self) -> dict:
+        with self._lock:
+            tokens = {fingerprint[:12]: budget.snapshot() for fingerprint, budget in self._budgets.items()}
+        return {
+            "tokens": tokens,
+            "throttled": self.throttled,
+            "throttled_seconds": self.throttled_seconds,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+        }
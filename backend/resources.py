@@ -0,0 +1,61 @@
+import os
+import threading
+
+# ----------------------------------------------------------------
+# Lazily created, fork-safe clients
+# ----------------------------------------------------------------
+
+
+class LazyResource:
+    """
+    Stand-in for a client (MongoDB, OpenAI, ...) that is only built on first use.
+
+    Importing the app therefore does no DNS lookups or connection setup, and a forked worker
+    process builds its own instance instead of sharing the parent's sockets and pools.
+    Attribute and item access are forwarded to the instance.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._instance = self._factory()
+                    self._pid = pid
+        return self._instance
+
+    @property
+    def created(self) -> bool:
+        """Whether the instance exists in this process."""
+        return self._pid == os.getpid()
+
+    def reset(self):
+        """Forget the instance so the next use builds a new one. Returns it if this process created it."""
+        with self._lock:
+            instance = self._instance if self.created else None
+            self._instance = None
+            self._pid = None
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __getitem__(self, name):
+        return self.get()[name]
+
+
+class LazyDatabase:
+    """A database of a lazily created MongoDB client; its collections are resolved on first use too."""
+
+    def __init__(self, client: LazyResource, name: str):
+        self.client = client
+        self.name = name
+
+    def __getitem__(self, collection: str) -> LazyResource:
+        return LazyResource(lambda: self.client.get()[self.name][collection])
@@ -0,0 +1,71 @@
+import json
+from typing import Any, Optional
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder.
+    orjson = None
+
+# ----------------------------------------------------------------
+# Compact JSON responses and partial-response field selection
+# ----------------------------------------------------------------
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered compactly through dumps()."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: str) -> dict:
+    """
+    Parse a selector such as "summary,milestones.title,milestones.issues.title" into a tree:
+    {"summary": None, "milestones": {"title": None, "issues": {"title": None}}}, where None keeps
+    the whole value.
+    """
+    tree = {}
+    for path in fields.split(","):
+        if not path.strip():
+            continue
+        names = [name.strip() for name in path.split(".")]
+        if not all(names):
+            raise HTTPException(status_code=400, detail=f"Invalid field selector: {path.strip()!r}")
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                break  # The parent is already selected as a whole.
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+def select_fields(value: Any, tree: Optional[dict]) -> Any:
+    """Keep only the selected keys of value; lists are selected element by element."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {name: select_fields(value[name], subtree) for name, subtree in tree.items() if name in value}
+    return value
+
+
+def json_response(content: Any, fields: Optional[str] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Render content directly (skipping FastAPI's jsonable_encoder pass, which is costly for large
+    plans), reduced to the comma-separated dotted paths in fields when given.
+    """
+    if fields:
+        content = select_fields(content, parse_fields(fields))
+    return FastJSONResponse(content, status_code=status_code)
@@ -0,0 +1,115 @@
+import re
+import json
+from typing import Optional
+
+# ----------------------------------------------------------------
+# Repository scaffold generated from a project plan
+# ----------------------------------------------------------------
+#
+# build_scaffold returns {path: content} for README.md, ROADMAP.md and starter files matching the
+# tech stack. main.py writes the whole scaffold as a single commit through the Git Data API.
+
+# Starter files per technology keyword (matched as a whole word in the tech stack).
+# "{package}" is replaced with a package-safe version of the repository name.
+STARTER_FILES = {
+    "python": {
+        "requirements.txt": "# One dependency per line, e.g. requests>=2.32\n",
+        "src/main.py": 'def main():\n    print("Hello from {package}!")\n\n\nif __name__ == "__main__":\n    main()\n',
+    },
+    "node": {
+        "package.json": json.dumps({"name": "{package}", "version": "0.1.0", "private": True,
+                                    "scripts": {"start": "node src/index.js"}}, indent=2) + "\n",
+        "src/index.js": 'console.log("Hello from {package}!");\n',
+    },
+    "go": {
+        "go.mod": "module {package}\n\ngo 1.22\n",
+        "main.go": 'package main\n\nimport "fmt"\n\nfunc main() {\n\tfmt.Println("Hello from {package}!")\n}\n',
+    },
+    "rust": {
+        "Cargo.toml": '[package]\nname = "{package}"\nversion = "0.1.0"\nedition = "2021"\n',
+        "src/main.rs": 'fn main() {\n    println!("Hello from {package}!");\n}\n',
+    },
+    "java": {
+        "src/main/java/Main.java": 'public class Main {\n    public static void main(String[] args) {\n'
+                                   '        System.out.println("Hello from {package}!");\n    }\n}\n',
+    },
+}
+
+GITIGNORE_LINES = {
+    "python": ["__pycache__/", "*.pyc", ".venv/", ".env"],
+    "node": ["node_modules/", "dist/", ".env"],
+    "go": ["/bin/", "*.exe"],
+    "rust": ["/target/"],
+    "java": ["target/", "build/", "*.class"],
+}
+
+# Frameworks and aliases mapped to the starter files of their language.
+TECH_ALIASES = {
+    "python": "python", "django": "python", "flask": "python", "fastapi": "python",
+    "node": "node", "nodejs": "node", "node.js": "node", "javascript": "node", "typescript": "node",
+    "react": "node", "next.js": "node", "nextjs": "node", "express": "node", "vue": "node",
+    "go": "go", "golang": "go",
+    "rust": "rust",
+    "java": "java", "spring": "java",
+}
+
+
+def detect_stacks(tech_stack: Optional[str]) -> list:
+    """Languages mentioned in a free-form tech stack, in order of first mention."""
+    stacks = []
+    for word in re.findall(r"[a-z0-9.+#]+", (tech_stack or "").lower()):
+        stack = TECH_ALIASES.get(word.rstrip("."))
+        if stack and stack not in stacks:
+            stacks.append(stack)
+    return stacks
+
+
+def package_name(repo_name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", repo_name.lower()).strip("-") or "app"
+
+
+def build_readme(repo_name: str, description: str, project_data: dict, tech_stack: Optional[str]) -> str:
+    lines = [f"# {repo_name}", ""]
+    if description:
+        lines += [description, ""]
+    if project_data.get("summary"):
+        lines += ["## Summary", "", project_data["summary"], ""]
+    if tech_stack:
+        lines += ["## Tech stack", "", tech_stack, ""]
+    milestones = project_data.get("milestones", [])
+    if milestones:
+        lines += ["## Milestones", "", "| # | Milestone | Due | Issues |", "| - | --------- | --- | ------ |"]
+        for index, milestone in enumerate(milestones, start=1):
+            lines.append(f"| {index} | {milestone.get('title', '')} | {milestone.get('due_date') or '-'} "
+                         f"| {len(milestone.get('issues', []))} |")
+        lines += ["", "See [ROADMAP.md](ROADMAP.md) for the full plan.", ""]
+    return "\n".join(lines)
+
+
+def build_roadmap(project_data: dict) -> str:
+    lines = ["# Roadmap", ""]
+    for index, milestone in enumerate(project_data.get("milestones", []), start=1):
+        due = f" (due {milestone['due_date']})" if milestone.get("due_date") else ""
+        lines += [f"## {index}. {milestone.get('title', '')}{due}", ""]
+        if milestone.get("description"):
+            lines += [milestone["description"], ""]
+        lines += [f"- [ ] {issue.get('title', '')}" for issue in milestone.get("issues", [])]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_scaffold(repo_name: str, description: str, project_data: dict, tech_stack: Optional[str] = None) -> dict:
+    """Files to commit to a new repository: README.md, ROADMAP.md and starter files for the tech stack."""
+    files = {
+        "README.md": build_readme(repo_name, description, project_data, tech_stack),
+        "ROADMAP.md": build_roadmap(project_data),
+    }
+    package = package_name(repo_name)
+    gitignore = []
+    for stack in detect_stacks(tech_stack):
+        for path, content in STARTER_FILES[stack].items():
+            files.setdefault(path, content.replace("{package}", package))
+        gitignore += [line for line in GITIGNORE_LINES[stack] if line not in gitignore]
+    if gitignore:
+        files[".gitignore"] = "\n".join(gitignore) + "\n"
+    return files
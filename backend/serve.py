@@ -0,0 +1,45 @@
+import os
+import uvicorn
+from dotenv import load_dotenv
+
+# ----------------------------------------------------------------
+# Production entry point: python -m backend.serve
+# ----------------------------------------------------------------
+#
+# Runs backend.main:app in WEB_CONCURRENCY uvicorn worker processes (default: one per CPU).
+# Every worker has its own MongoDB and GitHub connection pools. To stay within a connection
+# budget for the whole dyno, set MONGO_MAX_CONNECTIONS / GITHUB_MAX_CONNECTIONS: they are split
+# evenly across the workers, unless MONGO_MAX_POOL_SIZE / GITHUB_POOL_SIZE set a per-worker size.
+
+load_dotenv()
+
+
+def per_worker_pool_sizes(workers: int) -> dict:
+    """Per-worker pool sizes derived from the total connection budgets, for the variables not set explicitly."""
+    sizes = {}
+    for total_variable, pool_variable in (("MONGO_MAX_CONNECTIONS", "MONGO_MAX_POOL_SIZE"),
+                                          ("GITHUB_MAX_CONNECTIONS", "GITHUB_POOL_SIZE")):
+        total = os.getenv(total_variable)
+        if total and not os.getenv(pool_variable):
+            sizes[pool_variable] = str(max(int(total) // workers, 1))
+    return sizes
+
+
+def main():
+    workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+    # Worker processes inherit the environment.
+    os.environ.update(per_worker_pool_sizes(workers))
+    uvicorn.run(
+        "backend.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "*"),
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_TIMEOUT", "5")),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "20")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import datetime
+from fastapi import FastAPI, Request, Response
+
+# ----------------------------------------------------------------
+# In-memory stand-in for the GitHub REST and GraphQL APIs
+# ----------------------------------------------------------------
+#
+# Only the endpoints the backend uses are implemented. Behaviour is configured through
+# environment variables so the benchmark runner can start it as a plain uvicorn process:
+#
+#   FAKE_GITHUB_LATENCY_MS       base latency added to every request (default 50)
+#   FAKE_GITHUB_JITTER_MS        extra uniformly distributed latency (default 20)
+#   FAKE_GITHUB_RATE_LIMIT       primary requests per token and window (default 5000)
+#   FAKE_GITHUB_RATE_WINDOW      primary window length in seconds (default 3600)
+#   FAKE_GITHUB_SECONDARY_EVERY  answer every Nth write of a token with a secondary limit (0 = never)
+#   FAKE_GITHUB_RETRY_AFTER      Retry-After sent with secondary limits, in seconds (default 1)
+#
+# Repositories named "seeded-<milestones>x<issues>" (e.g. seeded-10x20) exist for every
+# token and are generated on first access.
+
+LATENCY = float(os.getenv("FAKE_GITHUB_LATENCY_MS", "50")) / 1000
+JITTER = float(os.getenv("FAKE_GITHUB_JITTER_MS", "20")) / 1000
+RATE_LIMIT = int(os.getenv("FAKE_GITHUB_RATE_LIMIT", "5000"))
+RATE_WINDOW = float(os.getenv("FAKE_GITHUB_RATE_WINDOW", "3600"))
+SECONDARY_EVERY = int(os.getenv("FAKE_GITHUB_SECONDARY_EVERY", "0"))
+RETRY_AFTER = int(os.getenv("FAKE_GITHUB_RETRY_AFTER", "1"))
+
+OWNER = "bench"
+SEEDED_REPO = re.compile(r"seeded-(\d+)x(\d+)$")
+ISSUE_PAGE = re.compile(r'm(\d+): milestone\(number: (\d+)\) \{ issues\(first: 100, after: ("[^"]*"|null)')
+
+app = FastAPI()
+repos = {}
+budgets = {}
+stats = {"requests": 0, "not_modified": 0, "primary_limited": 0, "secondary_limited": 0}
+
+
+def iso(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def new_repo(name: str) -> dict:
+    return {"name": name, "milestones": {}, "issues": {}, "next_number": 1,
+            "created_at": time.time(), "updated_at": time.time(),
+            "head": hashlib.sha1(f"{name}:initial".encode()).hexdigest(), "commits": 1}
+
+
+def add_milestone(repo: dict, title: str, description=None, due_on=None) -> dict:
+    number = repo["next_number"]
+    repo["next_number"] += 1
+    now = time.time()
+    milestone = {"number": number, "title": title, "description": description, "due_on": due_on,
+                 "state": "open", "created_at": now, "updated_at": now}
+    repo["milestones"][number] = milestone
+    repo["updated_at"] = now
+    return milestone
+
+
+def add_issue(repo: dict, title: str, body=None, milestone=None) -> dict:
+    number = repo["next_number"]
+    repo["next_number"] += 1
+    now = time.time()
+    issue = {"number": number, "title": title, "body": body, "milestone": milestone,
+             "state": "open", "created_at": now, "closed_at": None, "updated_at": now}
+    repo["issues"][number] = issue
+    repo["updated_at"] = now
+    return issue
+
+
+def get_repo(name: str):
+    repo = repos.get(name)
+    if repo is None:
+        match = SEEDED_REPO.match(name)
+        if match is None:
+            return None
+        repo = repos[name] = new_repo(name)
+        for m in range(int(match.group(1))):
+            milestone = add_milestone(repo, f"Milestone {m + 1}", f"Seeded milestone {m + 1}")
+            for i in range(int(match.group(2))):
+                add_issue(repo, f"Issue {m + 1}.{i + 1}", "Seeded issue", milestone["number"])
+    return repo
+
+
+def milestone_rest(repo: dict, milestone: dict) -> dict:
+    issues = [issue for issue in repo["issues"].values() if issue["milestone"] == milestone["number"]]
+    return {
+        "number": milestone["number"],
+        "title": milestone["title"],
+        "description": milestone["description"],
+        "state": milestone["state"],
+        "due_on": milestone["due_on"],
+        "open_issues": sum(1 for issue in issues if issue["state"] == "open"),
+        "closed_issues": sum(1 for issue in issues if issue["state"] == "closed"),
+        "updated_at": iso(milestone["updated_at"]),
+    }
+
+
+def issue_rest(repo: dict, issue: dict) -> dict:
+    milestone = repo["milestones"].get(issue["milestone"])
+    return {
+        "number": issue["number"],
+        "title": issue["title"],
+        "body": issue["body"],
+        "state": issue["state"],
+        "milestone": milestone_rest(repo, milestone) if milestone else None,
+        "created_at": iso(issue["created_at"]),
+        "closed_at": iso(issue["closed_at"]) if issue["closed_at"] else None,
+        "updated_at": iso(issue["updated_at"]),
+    }
+
+
+def issue_node(issue: dict) -> dict:
+    return {
+        "number": issue["number"],
+        "title": issue["title"],
+        "state": issue["state"].upper(),
+        "createdAt": iso(issue["created_at"]),
+        "closedAt": iso(issue["closed_at"]) if issue["closed_at"] else None,
+        "updatedAt": iso(issue["updated_at"]),
+    }
+
+
+def issue_page(repo: dict, milestone_number: int, after) -> dict:
+    issues = sorted((issue for issue in repo["issues"].values() if issue["milestone"] == milestone_number),
+                    key=lambda issue: issue["created_at"], reverse=True)
+    start = int(after or 0)
+    page = issues[start:start + 100]
+    return {
+        "pageInfo": {"hasNextPage": start + 100 < len(issues), "endCursor": str(start + len(page))},
+        "nodes": [issue_node(issue) for issue in page],
+    }
+
+
+def json_response(status: int, body, headers=None) -> Response:
+    return Response(json.dumps(body), status_code=status, media_type="application/json", headers=headers)
+
+
+@app.middleware("http")
+async def simulate_github(request: Request, call_next):
+    """Add latency and enforce primary and secondary rate limits the way GitHub reports them."""
+    await asyncio.sleep(LATENCY + random.uniform(0, JITTER))
+    stats["requests"] += 1
+    token = request.headers.get("Authorization", "anonymous")
+    now = time.time()
+    budget = budgets.get(token)
+    if budget is None or budget["reset"] <= now:
+        budget = budgets[token] = {"used": 0, "reset": now + RATE_WINDOW, "writes": 0}
+    resource = "graphql" if request.url.path == "/graphql" else "core"
+
+    def rate_headers() -> dict:
+        return {
+            "X-RateLimit-Limit": str(RATE_LIMIT),
+            "X-RateLimit-Remaining": str(max(RATE_LIMIT - budget["used"], 0)),
+            "X-RateLimit-Used": str(budget["used"]),
+            "X-RateLimit-Reset": str(int(budget["reset"])),
+            "X-RateLimit-Resource": resource,
+        }
+
+    if budget["used"] >= RATE_LIMIT:
+        stats["primary_limited"] += 1
+        return json_response(403, {"message": "API rate limit exceeded"}, rate_headers())
+    if request.method in ("POST", "PATCH") and resource == "core":
+        budget["writes"] += 1
+        if SECONDARY_EVERY and budget["writes"] % SECONDARY_EVERY == 0:
+            stats["secondary_limited"] += 1
+            return json_response(403, {"message": "You have exceeded a secondary rate limit."},
+                                 {**rate_headers(), "Retry-After": str(RETRY_AFTER)})
+
+    response = await call_next(request)
+    if response.status_code != 304:
+        budget["used"] += 1
+    for name, value in rate_headers().items():
+        response.headers[name] = value
+    return response
+
+
+def conditional(request: Request, body) -> Response:
+    """Answer GETs with an ETag, and with a 304 when the client already has the current body."""
+    content = json.dumps(body)
+    etag = f'"{hashlib.sha1(content.encode("utf-8")).hexdigest()}"'
+    if request.headers.get("If-None-Match") == etag:
+        stats["not_modified"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/user")
+async def get_user(request: Request):
+    return conditional(request, {"login": OWNER, "id": 1, "name": "Benchmark User"})
+
+
+@app.post("/user/repos")
+async def create_repo(request: Request):
+    payload = await request.json()
+    if get_repo(payload["name"]) is not None:
+        return json_response(422, {"message": "Repository creation failed.",
+                                   "errors": [{"message": "name already exists on this account"}]})
+    repos[payload["name"]] = new_repo(payload["name"])
+    return json_response(201, {"name": payload["name"], "html_url": f"https://github.com/{OWNER}/{payload['name']}"})
+
+
+@app.get("/repos/{owner}/{name}")
+async def get_repository(request: Request, owner: str, name: str):
+    repo = get_repo(name)
+    if repo is None:
+        return json_response(404, {"message": "Not Found"})
+    return conditional(request, {"name": name, "html_url": f"https://github.com/{OWNER}/{name}",
+                                 "default_branch": "main", "created_at": iso(repo["created_at"])})
+
+
+@app.get("/repos/{owner}/{name}/git/ref/heads/{branch}")
+async def get_branch_ref(owner: str, name: str, branch: str):
+    repo = get_repo(name)
+    if repo is None or branch != "main":
+        return json_response(404, {"message": "Not Found"})
+    return json_response(200, {"ref": f"refs/heads/{branch}", "object": {"type": "commit", "sha": repo["head"]}})
+
+
+@app.get("/repos/{owner}/{name}/git/commits/{sha}")
+async def get_commit(owner: str, name: str, sha: str):
+    if get_repo(name) is None:
+        return json_response(404, {"message": "Not Found"})
+    return json_response(200, {"sha": sha, "tree": {"sha": hashlib.sha1(f"{sha}:tree".encode()).hexdigest()}})
+
+
+@app.post("/repos/{owner}/{name}/git/trees")
+async def create_tree(request: Request, owner: str, name: str):
+    if get_repo(name) is None:
+        return json_response(404, {"message": "Not Found"})
+    payload = await request.json()
+    sha = hashlib.sha1(json.dumps(payload["tree"], sort_keys=True).encode()).hexdigest()
+    return json_response(201, {"sha": sha, "tree": [{"path": entry["path"], "type": "blob"} for entry in payload["tree"]]})
+
+
+@app.post("/repos/{owner}/{name}/git/commits")
+async def create_commit(request: Request, owner: str, name: str):
+    repo = get_repo(name)
+    if repo is None:
+        return json_response(404, {"message": "Not Found"})
+    payload = await request.json()
+    repo["commits"] += 1
+    sha = hashlib.sha1(f"{payload['tree']}:{payload['parents']}:{repo['commits']}".encode()).hexdigest()
+    return json_response(201, {"sha": sha, "tree": {"sha": payload["tree"]}, "parents": payload["parents"]})
+
+
+@app.patch("/repos/{owner}/{name}/git/refs/heads/{branch}")
+async def update_branch_ref(request: Request, owner: str, name: str, branch: str):
+    repo = get_repo(name)
+    if repo is None or branch != "main":
+        return json_response(404, {"message": "Not Found"})
+    repo["head"] = (await request.json())["sha"]
+    return json_response(200, {"ref": f"refs/heads/{branch}", "object": {"type": "commit", "sha": repo["head"]}})
+
+
+@app.post("/repos/{owner}/{name}/hooks")
+async def create_hook(owner: str, name: str):
+    return json_response(201, {"id": 1, "active": True})
+
+
+@app.get("/repos/{owner}/{name}/milestones")
+async def list_milestones(request: Request, owner: str, name: str, state: str = "open", per_page: int = 30):
+    repo = get_repo(name)
+    if repo is None:
+        return json_response(404, {"message": "Not Found"})
+    milestones = [milestone_rest(repo, milestone) for milestone in repo["milestones"].values()
+                  if state == "all" or milestone["state"] == state]
+    return conditional(request, milestones[:per_page])
+
+
+@app.post("/repos/{owner}/{name}/milestones")
+async def create_milestone(request: Request, owner: str, name: str):
+    repo = get_repo(name)
+    if repo is None:
+        return json_response(404, {"message": "Not Found"})
+    payload = await request.json()
+    milestone = add_milestone(repo, payload["title"], payload.get("description"), payload.get("due_on"))
+    return json_response(201, milestone_rest(repo, milestone))
+
+
+@app.get("/repos/{owner}/{name}/milestones/{number}")
+async def get_milestone(request: Request, owner: str, name: str, number: int):
+    repo = get_repo(name)
+    milestone = repo and repo["milestones"].get(number)
+    if not milestone:
+        return json_response(404, {"message": "Not Found"})
+    return conditional(request, milestone_rest(repo, milestone))
+
+
+@app.patch("/repos/{owner}/{name}/milestones/{number}")
+async def update_milestone(request: Request, owner: str, name: str, number: int):
+    repo = get_repo(name)
+    milestone = repo and repo["milestones"].get(number)
+    if not milestone:
+        return json_response(404, {"message": "Not Found"})
+    milestone.update({key: value for key, value in (await request.json()).items() if key in ("state", "title")})
+    milestone["updated_at"] = repo["updated_at"] = time.time()
+    return json_response(200, milestone_rest(repo, milestone))
+
+
+@app.get("/repos/{owner}/{name}/issues")
+async def list_issues(request: Request, owner: str, name: str, state: str = "open",
+                      milestone: str = None, sort: str = "created", per_page: int = 30):
+    repo = get_repo(name)
+    if repo is None:
+        return json_response(404, {"message": "Not Found"})
+    issues = [issue for issue in repo["issues"].values()
+              if (state == "all" or issue["state"] == state)
+              and (milestone is None or str(issue["milestone"]) == milestone)]
+    issues.sort(key=lambda issue: issue["updated_at" if sort == "updated" else "created_at"], reverse=True)
+    return conditional(request, [issue_rest(repo, issue) for issue in issues[:per_page]])
+
+
+@app.post("/repos/{owner}/{name}/issues")
+async def create_issue(request: Request, owner: str, name: str):
+    repo = get_repo(name)
+    if repo is None:
+        return json_response(404, {"message": "Not Found"})
+    payload = await request.json()
+    issue = add_issue(repo, payload["title"], payload.get("body"), payload.get("milestone"))
+    return json_response(201, issue_rest(repo, issue))
+
+
+@app.patch("/repos/{owner}/{name}/issues/{number}")
+async def update_issue(request: Request, owner: str, name: str, number: int):
+    repo = get_repo(name)
+    issue = repo and repo["issues"].get(number)
+    if not issue:
+        return json_response(404, {"message": "Not Found"})
+    payload = await request.json()
+    if payload.get("state") in ("open", "closed"):
+        issue["state"] = payload["state"]
+        issue["closed_at"] = time.time() if payload["state"] == "closed" else None
+    issue["updated_at"] = repo["updated_at"] = time.time()
+    return json_response(200, issue_rest(repo, issue))
+
+
+@app.post("/graphql")
+async def graphql(request: Request):
+    """Answer the two query shapes the backend sends: a milestones page, or aliased issue pages."""
+    payload = await request.json()
+    variables = payload.get("variables") or {}
+    repo = get_repo(variables.get("name", ""))
+    if repo is None:
+        return json_response(200, {"data": {"repository": None},
+                                   "errors": [{"message": "Could not resolve to a Repository"}]})
+    query = payload["query"]
+    aliases = ISSUE_PAGE.findall(query)
+    if aliases:
+        repository = {f"m{alias}": {"issues": issue_page(repo, int(number), json.loads(after))}
+                      for alias, number, after in aliases}
+        return json_response(200, {"data": {"repository": repository}})
+
+    milestones = sorted(repo["milestones"].values(), key=lambda milestone: milestone["number"])
+    start = int(variables.get("cursor") or 0)
+    page = milestones[start:start + 100]
+    nodes = [{
+        "number": milestone["number"],
+        "title": milestone["title"],
+        "state": milestone["state"].upper(),
+        "description": milestone["description"],
+        "dueOn": milestone["due_on"],
+        "updatedAt": iso(milestone["updated_at"]),
+        "issues": issue_page(repo, milestone["number"], None),
+    } for milestone in page]
+    return json_response(200, {"data": {"repository": {"milestones": {
+        "pageInfo": {"hasNextPage": start + 100 < len(milestones), "endCursor": str(start + len(page))},
+        "nodes": nodes,
+    }}}})
+
+
+@app.get("/_stats")
+async def get_stats():
+    return stats
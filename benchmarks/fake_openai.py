@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import random
+import asyncio
+import datetime
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# ----------------------------------------------------------------
+# Stand-in for the OpenAI chat completions API
+# ----------------------------------------------------------------
+#
+# Answers every request with a call of the requested tool holding a synthetic project plan
+# (or its skeleton, or the issues of one milestone, for two-phase generation).
+# Configured through environment variables:
+#
+#   FAKE_OPENAI_LATENCY_MS         time to first token (default 400)
+#   FAKE_OPENAI_JITTER_MS          extra uniformly distributed latency (default 100)
+#   FAKE_OPENAI_TOKENS_PER_SECOND  generation speed, 0 for instant (default 200)
+#   FAKE_OPENAI_MILESTONES         milestones per generated plan (default 5)
+#   FAKE_OPENAI_ISSUES             issues per milestone (default 5)
+
+LATENCY = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "400")) / 1000
+JITTER = float(os.getenv("FAKE_OPENAI_JITTER_MS", "100")) / 1000
+TOKENS_PER_SECOND = float(os.getenv("FAKE_OPENAI_TOKENS_PER_SECOND", "200"))
+MILESTONES = int(os.getenv("FAKE_OPENAI_MILESTONES", "5"))
+ISSUES = int(os.getenv("FAKE_OPENAI_ISSUES", "5"))
+# Roughly how many characters of JSON make up one token.
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = 8
+
+app = FastAPI()
+stats = {"requests": 0, "streamed": 0, "completion_tokens": 0}
+
+
+def synthetic_plan() -> dict:
+    today = datetime.date.today()
+    return {
+        "summary": "A synthetic project plan generated for benchmarking.",
+        "milestones": [
+            {
+                "title": f"Milestone {m + 1}",
+                "description": f"Deliver the work planned for week {m + 1}.",
+                "due_date": (today + datetime.timedelta(weeks=m + 1)).isoformat(),
+                "issues": [
+                    {"title": f"Task {m + 1}.{i + 1}",
+                     "description": "1. Read the requirements.\n2. Implement the change.\n3. Write tests."}
+                    for i in range(ISSUES)
+                ],
+            }
+            for m in range(MILESTONES)
+        ],
+    }
+
+
+def synthetic_arguments(name: str) -> dict:
+    plan = synthetic_plan()
+    if name == "generate_project_skeleton":
+        for milestone in plan["milestones"]:
+            milestone["issues"] = [issue["title"] for issue in milestone["issues"]]
+    elif name == "expand_milestone_issues":
+        return {"issues": plan["milestones"][0]["issues"]}
+    return plan
+
+
+def tool_name(payload: dict) -> str:
+    choice = payload.get("tool_choice")
+    if isinstance(choice, dict):
+        return choice["function"]["name"]
+    return payload["tools"][0]["function"]["name"]
+
+
+def usage(payload: dict, arguments: str) -> dict:
+    prompt_tokens = len(json.dumps(payload.get("messages", []))) // CHARS_PER_TOKEN
+    completion_tokens = len(arguments) // CHARS_PER_TOKEN
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def generation_seconds(text: str) -> float:
+    if not TOKENS_PER_SECOND:
+        return 0.0
+    return len(text) / CHARS_PER_TOKEN / TOKENS_PER_SECOND
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    stats["requests"] += 1
+    name = tool_name(payload)
+    arguments = json.dumps(synthetic_arguments(name))
+    completion_id = f"chatcmpl-bench-{stats['requests']}"
+    created = int(time.time())
+    stats["completion_tokens"] += len(arguments) // CHARS_PER_TOKEN
+    await asyncio.sleep(LATENCY + random.uniform(0, JITTER))
+
+    if not payload.get("stream"):
+        await asyncio.sleep(generation_seconds(arguments))
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": payload["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{"id": "call_bench", "type": "function",
+                                    "function": {"name": name, "arguments": arguments}}],
+                },
+            }],
+            "usage": usage(payload, arguments),
+        })
+
+    stats["streamed"] += 1
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": payload["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }) + "\n\n"
+
+    async def events():
+        yield chunk({"role": "assistant", "tool_calls": [
+            {"index": 0, "id": "call_bench", "type": "function", "function": {"name": name, "arguments": ""}}
+        ]})
+        size = CHUNK_TOKENS * CHARS_PER_TOKEN
+        for start in range(0, len(arguments), size):
+            fragment = arguments[start:start + size]
+            await asyncio.sleep(generation_seconds(fragment))
+            yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": fragment}}]})
+        yield chunk({}, finish_reason="stop")
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            yield "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": payload["model"],
+                "choices": [],
+                "usage": usage(payload, arguments),
+            }) + "\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/_stats")
+async def get_stats():
+    return stats
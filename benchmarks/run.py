@@ -0,0 +1,385 @@
+"""
+Offline benchmarks for the backend.
+
+Starts the FastAPI app with uvicorn against local GitHub and OpenAI stand-ins (benchmarks/fake_github.py
+and benchmarks/fake_openai.py), drives its endpoints with concurrent requests and reports p50/p95/p99
+latency and throughput. MongoDB must be reachable at --mongo-uri; every run uses a fresh database that is
+dropped afterwards.
+
+    python -m benchmarks.run                                   # every scenario with the defaults
+    python -m benchmarks.run --scenarios fetch-milestones --repo-sizes 5x10,5x250
+    python -m benchmarks.run --github-latency-ms 120 --secondary-every 25 --label slow-github
+    python -m benchmarks.run compare benchmarks/results/a.json benchmarks/results/b.json
+
+Results are written to benchmarks/results/<label>.json.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import datetime
+import statistics
+import subprocess
+import httpx
+from pymongo import AsyncMongoClient
+
+SCENARIOS = ("create-repo", "fetch-milestones", "generate-project-data", "projects")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TERMINAL_JOB_STATES = ("succeeded", "failed")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_sizes(value: str) -> list:
+    """Parse "5x10,20x50" into [(5, 10), (20, 50)]."""
+    sizes = []
+    for size in value.split(","):
+        milestones, issues = size.lower().split("x")
+        sizes.append((int(milestones), int(issues)))
+    return sizes
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: list, errors: int, wall_seconds: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "mean_ms": statistics.fmean(values) if values else 0.0,
+        "max_ms": values[-1] if values else 0.0,
+        "throughput_rps": len(values) / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+async def run_load(make_request, total: int, concurrency: int) -> dict:
+    """Run make_request(i) for i in range(total) with at most `concurrency` in flight."""
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await make_request(index)
+                latencies.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                errors += 1
+                print(f"  request {index} failed: {e}", file=sys.stderr)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+class Servers:
+    """The backend and both stand-ins, each in its own uvicorn process."""
+
+    def __init__(self, args, database: str):
+        self.args = args
+        self.database = database
+        self.processes = []
+        self.github_url = f"http://127.0.0.1:{free_port()}"
+        self.openai_url = f"http://127.0.0.1:{free_port()}"
+        self.backend_url = f"http://127.0.0.1:{free_port()}"
+
+    def spawn(self, module: str, url: str, env: dict):
+        command = [sys.executable, "-m", "uvicorn", module, "--host", "127.0.0.1",
+                   "--port", url.rsplit(":", 1)[1], "--log-level", "warning"]
+        self.processes.append(subprocess.Popen(command, cwd=ROOT_DIR, env={**os.environ, **env}))
+
+    async def start(self):
+        args = self.args
+        self.spawn("benchmarks.fake_github:app", self.github_url, {
+            "FAKE_GITHUB_LATENCY_MS": str(args.github_latency_ms),
+            "FAKE_GITHUB_JITTER_MS": str(args.github_jitter_ms),
+            "FAKE_GITHUB_RATE_LIMIT": str(args.rate_limit),
+            "FAKE_GITHUB_SECONDARY_EVERY": str(args.secondary_every),
+        })
+        self.spawn("benchmarks.fake_openai:app", self.openai_url, {
+            "FAKE_OPENAI_LATENCY_MS": str(args.openai_latency_ms),
+            "FAKE_OPENAI_TOKENS_PER_SECOND": str(args.openai_tokens_per_second),
+        })
+        self.spawn("backend.main:app", self.backend_url, {
+            "GITHUB_API_URL": self.github_url,
+            "OPENAI_BASE_URL": f"{self.openai_url}/v1",
+            "OPENAI_API_KEY": "benchmark",
+            "MONGO_URI": args.mongo_uri,
+            "DB_NAME": self.database,
+        })
+        async with httpx.AsyncClient() as client:
+            for url in (f"{self.github_url}/_stats", f"{self.openai_url}/_stats", f"{self.backend_url}/readyz"):
+                await wait_until_up(client, url)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def wait_until_up(client: httpx.AsyncClient, url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+
+def checked(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def plan(milestones: int, issues: int) -> dict:
+    today = datetime.date.today()
+    return {
+        "summary": "Benchmark plan",
+        "milestones": [
+            {
+                "title": f"Milestone {m + 1}",
+                "description": "Benchmark milestone",
+                "due_date": (today + datetime.timedelta(weeks=m + 1)).isoformat(),
+                "issues": [{"title": f"Task {m + 1}.{i + 1}", "description": "Benchmark issue"} for i in range(issues)],
+            }
+            for m in range(milestones)
+        ],
+    }
+
+
+async def bench_create_repo(client, args, run_id: str) -> dict:
+    results = {}
+    for milestones, issues in parse_sizes(args.plan_sizes):
+        project_data = plan(milestones, issues)
+        accept_latencies = []
+
+        async def create(index):
+            started = time.perf_counter()
+            response = checked(await client.post("/create-repo", json={
+                "repo_name": f"bench-{run_id}-{milestones}x{issues}-{index}",
+                "repo_description": "Benchmark repository",
+                "private": True,
+                "token": f"bench-token-{index % args.tokens}",
+                "project_data": project_data,
+                "tech_stack": "Python, React",
+            }))
+            accept_latencies.append((time.perf_counter() - started) * 1000)
+            status_url = response.json()["status_url"]
+            while True:
+                job = checked(await client.get(status_url, headers={"token": f"bench-token-{index % args.tokens}"})).json()
+                if job["status"] in TERMINAL_JOB_STATES:
+                    break
+                await asyncio.sleep(args.poll_interval)
+            if job["status"] != "succeeded":
+                raise RuntimeError(f"job {job['job_id']} {job['status']}: {job.get('error')}")
+
+        name = f"create-repo[{milestones}x{issues}]"
+        print(f"{name} ...")
+        results[name] = await run_load(create, args.create_repo_requests, args.concurrency)
+        results[f"create-repo-accept[{milestones}x{issues}]"] = summarize(accept_latencies, 0, 0)
+    return results
+
+
+async def bench_fetch_milestones(client, args, run_id: str) -> dict:
+    results = {}
+    for milestones, issues in parse_sizes(args.repo_sizes):
+        path = f"/fetch-milestones/bench/seeded-{milestones}x{issues}"
+
+        async def fetch_warm(index):
+            checked(await client.get(path, params={"token": "bench-token-0"}))
+
+        async def fetch_cold(index):
+            # A token the backend has never seen, so no per-token cache can answer.
+            checked(await client.get(path, params={"token": f"bench-cold-{run_id}-{index}"}))
+
+        for name, request in ((f"fetch-milestones[{milestones}x{issues}]", fetch_warm),
+                              (f"fetch-milestones-cold[{milestones}x{issues}]", fetch_cold)):
+            print(f"{name} ...")
+            for index in range(args.warmup):
+                await request(-1 - index)
+            results[name] = await run_load(request, args.requests, args.concurrency)
+    return results
+
+
+async def bench_generate_project_data(client, args, run_id: str) -> dict:
+    def body(description: str, use_cache: bool) -> dict:
+        return {"project_description": description, "features": "Accounts, dashboards, notifications",
+                "duration": "6", "hours_per_day": 4, "tech_stack": "React, FastAPI", "use_cache": use_cache}
+
+    async def generate(index):
+        checked(await client.post("/generate-project-data", json=body(f"Benchmark project {run_id} {index}", False)))
+
+    async def generate_cached(index):
+        checked(await client.post("/generate-project-data", json=body(f"Benchmark project {run_id} cached", True)))
+
+    results = {}
+    for name, request in (("generate-project-data", generate), ("generate-project-data-cached", generate_cached)):
+        print(f"{name} ...")
+        for index in range(args.warmup):
+            await request(-1 - index)
+        results[name] = await run_load(request, args.requests, args.concurrency)
+    return results
+
+
+async def bench_projects(client, args, run_id: str) -> dict:
+    username = f"bench-{run_id}"
+
+    async def insert(index):
+        checked(await client.post("/projects", json={
+            "username": username, "github_token": "bench-token-0", "title": f"Project {index}",
+            "description": "Benchmark project", "github_repo_link": f"https://github.com/bench/project-{index}",
+        }))
+
+    async def list_projects(index):
+        checked(await client.get("/projects", params={"username": username, "limit": 50}))
+
+    print("projects (seeding) ...")
+    results = {"projects-insert": await run_load(insert, args.projects, args.concurrency)}
+    print("projects ...")
+    for index in range(args.warmup):
+        await list_projects(-1 - index)
+    results["projects-list"] = await run_load(list_projects, args.requests, args.concurrency)
+    return results
+
+
+BENCHMARKS = {
+    "create-repo": bench_create_repo,
+    "fetch-milestones": bench_fetch_milestones,
+    "generate-project-data": bench_generate_project_data,
+    "projects": bench_projects,
+}
+
+
+async def run(args) -> dict:
+    mongo = AsyncMongoClient(args.mongo_uri, serverSelectionTimeoutMS=3000)
+    try:
+        await mongo.admin.command("ping")
+    except Exception as e:
+        raise SystemExit(f"MongoDB is not reachable at {args.mongo_uri}: {e}")
+
+    run_id = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    database = f"benchmark_{run_id}"
+    servers = Servers(args, database)
+    scenarios = {}
+    try:
+        await servers.start()
+        async with httpx.AsyncClient(base_url=servers.backend_url, timeout=args.timeout,
+                                     limits=httpx.Limits(max_connections=args.concurrency * 2)) as client:
+            for scenario in args.scenarios.split(","):
+                scenarios.update(await BENCHMARKS[scenario](client, args, run_id))
+            backend_stats = {"cache_stats": (await client.get("/cache-stats")).json(),
+                             "rate_limits": (await client.get("/rate-limits")).json()}
+            github_stats = (await client.get(f"{servers.github_url}/_stats")).json()
+            openai_stats = (await client.get(f"{servers.openai_url}/_stats")).json()
+    finally:
+        servers.stop()
+        await mongo.drop_database(database)
+        await mongo.close()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("command", "files")}
+    return {"run_id": run_id, "config": config, "scenarios": scenarios,
+            "backend": backend_stats, "fake_github": github_stats, "fake_openai": openai_stats}
+
+
+def print_table(scenarios: dict):
+    print(f"{'scenario':<36}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for name, result in scenarios.items():
+        print(f"{name:<36}{result['count']:>6}{result['errors']:>5}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['throughput_rps']:>9.1f}")
+
+
+def compare(baseline_path: str, candidate_path: str):
+    """Print the change of every metric from a baseline run to a candidate run."""
+    with open(baseline_path) as baseline_file, open(candidate_path) as candidate_file:
+        baseline, candidate = json.load(baseline_file)["scenarios"], json.load(candidate_file)["scenarios"]
+
+    def delta(before: float, after: float) -> str:
+        return f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+
+    print(f"{'scenario':<36}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    for name in baseline:
+        if name not in candidate:
+            continue
+        row = f"{name:<36}"
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            before, after = baseline[name][metric], candidate[name][metric]
+            row += f"{after:>11.1f} {delta(before, after):>6}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline backend benchmarks")
+    parser.add_argument("command", nargs="?", default="run", choices=("run", "compare"))
+    parser.add_argument("files", nargs="*", help="two result files for compare")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--create-repo-requests", type=int, default=10, help="repositories per plan size")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--plan-sizes", default="3x3,5x6,10x10", help="create-repo plans, MILESTONESxISSUES")
+    parser.add_argument("--repo-sizes", default="5x10,20x50,5x250", help="fetch-milestones repositories")
+    parser.add_argument("--projects", type=int, default=200, help="projects stored before listing them")
+    parser.add_argument("--tokens", type=int, default=3, help="distinct GitHub tokens used by create-repo")
+    parser.add_argument("--github-latency-ms", type=float, default=50)
+    parser.add_argument("--github-jitter-ms", type=float, default=20)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="fake GitHub primary limit per token")
+    parser.add_argument("--secondary-every", type=int, default=0, help="fail every Nth write with a secondary limit")
+    parser.add_argument("--openai-latency-ms", type=float, default=400)
+    parser.add_argument("--openai-tokens-per-second", type=float, default=200)
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCHMARK_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--label", help="result file name (defaults to the run timestamp)")
+    parser.add_argument("--output", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        if len(args.files) != 2:
+            parser.error("compare takes a baseline and a candidate result file")
+        compare(*args.files)
+        return
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{args.label or report['run_id']}.json")
+    with open(path, "w") as result_file:
+        json.dump(report, result_file, indent=2)
+    print_table(report["scenarios"])
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ export default function App() {
   const [submitted, setSubmitted] = useState(false);
   const [confirmed, setConfirmed] = useState(false);
   const [response, setResponse] = useState(null);
+  const [techStack, setTechStack] = useState("");
   const [confirmationResponse, setConfirmationResponse] = useState(null);
 
   return (
@@ -35,10 +36,15 @@ export default function App() {
             setSubmitted={setSubmitted}
             setConfirmationResponse={setConfirmationResponse}
             response={response}
+            techStack={techStack}
           />
         )
       ) : (
-        <Form setResponse={setResponse} setSubmitted={setSubmitted} />
+        <Form
+          setResponse={setResponse}
+          setSubmitted={setSubmitted}
+          setTechStack={setTechStack}
+        />
       )}
     </>
   );
@@ -116,6 +122,7 @@ function Confirmation({
   setSubmitted,
   setConfirmationResponse,
   response,
+  techStack,
 }) {
   const parseDescriptionToList = (description) => {
     // Split the description by numbers, keeping the numbered steps intact
@@ -161,13 +168,30 @@ function Confirmation({
     event.preventDefault();
     setLoading(true);
     try {
-      const reply = await api.post("/create-repo", {
+      const jobReply = await api.post("/create-repo", {
         repo_name: tempAnswers.repoName,
         repo_description: tempAnswers.repoDescription,
         private: tempAnswers.repoPrivacy,
         token: tempAnswers.PAT,
         project_data: projectData,
+        // Selects the starter files of the scaffold commit.
+        tech_stack: techStack || null,
       });
+      // Provisioning runs in the background; poll the job until it finishes.
+      let job = { status: "queued" };
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobStatus = await api.get(jobReply.data.status_url, {
+          headers: {
+            token: tempAnswers.PAT,
+          },
+        });
+        job = jobStatus.data;
+      }
+      if (job.status !== "succeeded") {
+        throw new Error(job.error || "Repository creation failed");
+      }
+      const reply = { data: job.repo_url };
       const usernameReply = await api.get("/get-github-username", {
         headers: {
           token: tempAnswers.PAT,
@@ -418,7 +442,7 @@ function Confirmation({
   );
 }
 
-function Form({ setSubmitted, setResponse }) {
+function Form({ setSubmitted, setResponse, setTechStack }) {
   const [answers, setAnswers] = useState({
     question1: "",
     question2: "",
@@ -470,6 +494,7 @@ function Form({ setSubmitted, setResponse }) {
 
       console.log("✅ Response:", response.data);
       setResponse(response.data);
+      setTechStack(tempAnswers.question5);
       setSubmitted(true);
       setLoading(false);
       setAnswers(tempAnswers); // make sure tempAnswers is defined